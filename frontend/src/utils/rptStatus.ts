@@ -0,0 +1,89 @@
+/**
+ * Render rpt status variables (cpu_temp, WX, ALERT) written by
+ * ast_node_status_update.py with STATUS_FORMAT = compact.
+ *
+ * Compact values are short tokens instead of inline-styled HTML:
+ *   cpu_temp  ~T|<band 0-2>|<value>|<unit>
+ *   WX        ~W|<label>|<report>
+ *   ALERT     ~A|<provider S/C>|<state>  or  ~A|<provider>|<rank><event>|...
+ * Styling comes from the .rpt-* classes in style.css. Anything that is not a
+ * token (legacy HTML output) is returned unchanged.
+ */
+
+const ALERT_PROVIDERS: Record<string, { name: string; url: string }> = {
+  S: { name: 'SkywarnPlus-NG', url: 'https://github.com/hardenedpenguin/SkywarnPlus-NG' },
+  C: { name: 'CANWarn-NG', url: 'https://github.com/hardenedpenguin/CANWarn' },
+}
+
+const ALERT_STATES: Record<string, { text: string; cls: string }> = {
+  N: { text: 'No Alerts', cls: 'rpt-alert-none' },
+  X: { text: 'API Error', cls: 'rpt-alert-error' },
+  T: { text: 'API Timeout', cls: 'rpt-alert-offline' },
+  O: { text: 'API Offline', cls: 'rpt-alert-offline' },
+}
+
+// SEVERITY_RANK in the updater; 0 (unknown) is shown like Extreme
+const SEVERITY_CLASSES = ['rpt-sev-extreme', 'rpt-sev-minor', 'rpt-sev-moderate', 'rpt-sev-severe', 'rpt-sev-extreme']
+
+const TEMP_BANDS = ['rpt-temp-ok', 'rpt-temp-warm', 'rpt-temp-hot']
+
+function escapeHtml(text: string): string {
+  return text
+    .replace(/&/g, '&amp;')
+    .replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;')
+    .replace(/"/g, '&quot;')
+    .replace(/'/g, '&#39;')
+}
+
+/** Values are stored quoted by `rpt set variable`; strip one pair of quotes. */
+function unquote(value: string): string {
+  const trimmed = value.trim()
+  return trimmed.length >= 2 && trimmed.startsWith('"') && trimmed.endsWith('"') ? trimmed.slice(1, -1) : trimmed
+}
+
+export function isCompactStatus(value: string | null | undefined): boolean {
+  return typeof value === 'string' && /^~[TWA]\|/.test(unquote(value))
+}
+
+function renderTemp(fields: string[]): string {
+  const [band, value, unit] = fields
+  const cls = TEMP_BANDS[Number(band)] ?? TEMP_BANDS[2]
+  return `<span class="rpt-temp ${cls}"><b>${escapeHtml(value ?? '')} ${escapeHtml(unit ?? '')}</b></span>`
+}
+
+function renderWeather(fields: string[]): string {
+  const [label = '', report = ''] = fields
+  return `<b class="rpt-wx">${escapeHtml(label)}   (${escapeHtml(report)})</b>`
+}
+
+function renderAlert(fields: string[]): string {
+  const [code = 'S', ...rest] = fields
+  const provider = ALERT_PROVIDERS[code] ?? ALERT_PROVIDERS.S
+  const link = `<a href="${provider.url}" class="rpt-alert-link">${provider.name}</a>`
+  if (rest[0] === 'D') {
+    return `<span class="rpt-alert-provider rpt-alert-disabled"><b><u>${link} Disabled</u></b></span>`
+  }
+  const lines = [`<span class="rpt-alert-provider rpt-alert-enabled"><b><u>${link} Enabled</u></b></span>`]
+  const state = ALERT_STATES[rest[0] ?? '']
+  if (state) {
+    lines.push(`<span class="${state.cls}">${state.text}</span>`)
+  } else {
+    for (const entry of rest) {
+      const rank = Number(entry.charAt(0))
+      const cls = SEVERITY_CLASSES[rank] ?? SEVERITY_CLASSES[0]
+      lines.push(`<span class="${cls}"><b>${escapeHtml(entry.slice(1))}</b></span>`)
+    }
+  }
+  return lines.join('<br>')
+}
+
+/** HTML for a cpu_temp / WX / ALERT value, compact token or legacy HTML. */
+export function renderStatusValue(value: string | null | undefined): string {
+  if (value == null) return ''
+  if (!isCompactStatus(value)) return value
+  const [kind, ...fields] = unquote(value).split('|')
+  if (kind === '~T') return renderTemp(fields)
+  if (kind === '~W') return renderWeather(fields)
+  return renderAlert(fields)
+}
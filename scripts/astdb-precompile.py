@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Precompile cache/astdb_cache.php right after astdb.txt is refreshed.
+
+Builds exactly what AstdbCacheService::loadAndParseFile() and
+buildSearchIndexes() build on a cold request (node array plus callsign /
+location / description indexes), serializes it in PHP serialize() format,
+gzcompress()es it and atomically replaces the cache file. The web app then
+only has to unserialize a finished cache; no request parses astdb.txt.
+
+astdb.txt already contains privatenodes.txt (DatabaseGenerationService
+writes private nodes first), so it is the only input.
+
+Usage:
+  python3 scripts/astdb-precompile.py --astdb /var/www/html/supermon-ng/astdb.txt
+                                      [--cache cache/astdb_cache.php] [--quiet]
+
+--astdb must be the same path string the PHP app uses (ASTDB_TXT), since the
+cache records it and AstdbCacheService ignores caches for other paths.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE = REPO_ROOT / "cache" / "astdb_cache.php"
+CACHE_VERSION = "1.2"
+
+# PHP trim() default character list
+PHP_TRIM = b" \t\n\r\0\x0b"
+# String array keys PHP stores as integers
+PHP_INT_KEY_RE = re.compile(rb"^(0|-?[1-9][0-9]*)$")
+PHP_INT_MAX = 2**63 - 1
+
+
+def _php_empty(value: bytes) -> bool:
+    return value == b"" or value == b"0"
+
+
+def _php_key(key: bytes) -> bytes | int:
+    if PHP_INT_KEY_RE.match(key):
+        number = int(key)
+        if -PHP_INT_MAX - 1 <= number <= PHP_INT_MAX:
+            return number
+    return key
+
+
+def parse_astdb(path: str) -> dict:
+    """AstdbCacheService::loadAndParseFile(): node id => entry."""
+    astdb: dict = {}
+    with open(path, "rb") as f:
+        for raw in f:
+            line = raw.strip(PHP_TRIM)
+            if _php_empty(line):
+                continue
+            parts = line.split(b"|", 3)
+            if len(parts) < 4:
+                continue
+            node_id = parts[0].strip(PHP_TRIM)
+            if _php_empty(node_id):
+                continue
+            astdb[_php_key(node_id)] = {
+                b"node_id": node_id,
+                b"callsign": parts[1].strip(PHP_TRIM),
+                b"description": parts[2].strip(PHP_TRIM),
+                b"location": parts[3].strip(PHP_TRIM),
+            }
+    return astdb
+
+
+def build_indexes(astdb: dict) -> dict:
+    """AstdbCacheService::buildSearchIndexes(): lowercased field => [node ids]."""
+    indexes: dict = {b"callsign": {}, b"location": {}, b"description": {}}
+    for node_id, entry in astdb.items():
+        for field in (b"callsign", b"location", b"description"):
+            # strtolower() is ASCII-only, like bytes.lower()
+            value = entry[field].lower()
+            if not _php_empty(value):
+                indexes[field].setdefault(_php_key(value), []).append(node_id)
+    return indexes
+
+
+def php_serialize(value, out: list) -> None:
+    """Append the PHP serialize() encoding of value to out (list of bytes)."""
+    if value is None:
+        out.append(b"N;")
+    elif value is True or value is False:
+        out.append(b"b:1;" if value else b"b:0;")
+    elif isinstance(value, int):
+        out.append(b"i:%d;" % value)
+    elif isinstance(value, str):
+        php_serialize(value.encode("utf-8"), out)
+    elif isinstance(value, bytes):
+        out.append(b's:%d:"' % len(value))
+        out.append(value)
+        out.append(b'";')
+    elif isinstance(value, dict):
+        out.append(b"a:%d:{" % len(value))
+        for key, item in value.items():
+            if isinstance(key, str):
+                key = _php_key(key.encode("utf-8"))
+            php_serialize(key, out)
+            php_serialize(item, out)
+        out.append(b"}")
+    elif isinstance(value, list):
+        php_serialize(dict(enumerate(value)), out)
+    else:
+        raise TypeError(f"cannot serialize {type(value).__name__}")
+
+
+def precompile(astdb_path: str, cache_path: Path) -> dict:
+    """Write the cache file; returns timing and size figures."""
+    started = time.perf_counter()
+    mtime = int(os.stat(astdb_path).st_mtime)
+    astdb = parse_astdb(astdb_path)
+    indexes = build_indexes(astdb)
+    parsed = time.perf_counter()
+
+    # Same keys, in the same order, as AstdbCacheService::saveApplicationCache()
+    cache_data = {
+        "data": astdb,
+        "mtime": mtime,
+        "timestamp": int(time.time()),
+        "file_path": astdb_path,
+        "compressed": True,
+        "version": CACHE_VERSION,
+        "indexes": indexes,
+    }
+    out: list = []
+    php_serialize(cache_data, out)
+    serialized = b"".join(out)
+    compressed = zlib.compress(serialized, 9)
+    encoded = time.perf_counter()
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".astdb_cache-", dir=str(cache_path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(compressed)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, cache_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return {
+        "entries": len(astdb),
+        "parse_ms": round((parsed - started) * 1000, 1),
+        "encode_ms": round((encoded - parsed) * 1000, 1),
+        "serialized_bytes": len(serialized),
+        "cache_bytes": len(compressed),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Precompile the ASTDB PHP cache.")
+    parser.add_argument("--astdb", required=True, help="astdb.txt path, exactly as configured in ASTDB_TXT")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE)
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.astdb):
+        print(f"ASTDB file not found: {args.astdb}", file=sys.stderr)
+        return 1
+    try:
+        stats = precompile(args.astdb, args.cache)
+    except OSError as e:
+        print(f"Could not write {args.cache}: {e}", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(
+            f"Wrote {args.cache}: {stats['entries']} nodes, parse {stats['parse_ms']} ms, "
+            f"encode {stats['encode_ms']} ms, {stats['cache_bytes']} bytes "
+            f"({stats['serialized_bytes']} uncompressed)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
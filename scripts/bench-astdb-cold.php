@@ -0,0 +1,116 @@
+#!/usr/bin/env php
+<?php
+
+declare(strict_types=1);
+
+/**
+ * Cold-request ASTDB latency: lazy cache build vs scripts/astdb-precompile.py.
+ *
+ * Each run is a fresh PHP process (no request/application-level statics), timing
+ * AstdbCacheService::getAstdb() plus one searchNodes() call:
+ *
+ *   lazy         cache/astdb_cache.php deleted first, so the request parses
+ *                astdb.txt, builds indexes and writes the cache itself
+ *   precompiled  cache written by astdb-precompile.py after the refresh, so the
+ *                request only loads it (indexes included)
+ *
+ * Overwrites cache/astdb_cache.php; it is left in the precompiled state.
+ *
+ * Usage:
+ *   php scripts/bench-astdb-cold.php [astdb.txt] [runs]
+ */
+
+if (php_sapi_name() !== 'cli') {
+    fwrite(STDERR, "This script must be run from the command line.\n");
+    exit(1);
+}
+
+$root = dirname(__DIR__);
+chdir($root);
+
+require_once $root . '/vendor/autoload.php';
+
+use Monolog\Handler\NullHandler;
+use Monolog\Logger;
+use SupermonNg\Services\AstdbCacheService;
+
+$cacheFile = $root . '/cache/astdb_cache.php';
+
+if (($argv[1] ?? '') === '--child') {
+    $service = new AstdbCacheService(new Logger('bench', [new NullHandler()]), $argv[2]);
+    $start = microtime(true);
+    $count = count($service->getAstdb());
+    $loaded = microtime(true);
+    $service->searchNodes('w5gle');
+    $searched = microtime(true);
+    echo json_encode([
+        'entries' => $count,
+        'load_ms' => ($loaded - $start) * 1000,
+        'search_ms' => ($searched - $loaded) * 1000,
+        'peak_mb' => memory_get_peak_usage(true) / 1048576,
+    ]), "\n";
+    exit(0);
+}
+
+$astdb = realpath($argv[1] ?? $root . '/astdb.txt');
+$runs = max(1, (int) ($argv[2] ?? 5));
+if ($astdb === false) {
+    fwrite(STDERR, "astdb.txt not found\n");
+    exit(1);
+}
+
+function run_child(string $astdb): array
+{
+    $out = shell_exec(escapeshellarg(PHP_BINARY) . ' ' . escapeshellarg(__FILE__) . ' --child ' . escapeshellarg($astdb));
+    $result = json_decode((string) $out, true);
+    if (!is_array($result)) {
+        fwrite(STDERR, "child run failed: {$out}\n");
+        exit(1);
+    }
+    return $result;
+}
+
+function median(array $values): float
+{
+    sort($values);
+    $mid = intdiv(count($values), 2);
+    return count($values) % 2 ? $values[$mid] : ($values[$mid - 1] + $values[$mid]) / 2;
+}
+
+function report(string $label, array $results): void
+{
+    printf(
+        "%-12s %8d %10.1f %10.2f %8.1f\n",
+        $label,
+        $results[0]['entries'],
+        median(array_column($results, 'load_ms')),
+        median(array_column($results, 'search_ms')),
+        median(array_column($results, 'peak_mb'))
+    );
+}
+
+printf("%-12s %8s %10s %10s %8s\n", 'mode', 'nodes', 'load ms', 'search ms', 'peak MB');
+
+$lazy = [];
+for ($i = 0; $i < $runs; $i++) {
+    @unlink($cacheFile);
+    $lazy[] = run_child($astdb);
+}
+report('lazy', $lazy);
+
+$start = microtime(true);
+exec('python3 ' . escapeshellarg($root . '/scripts/astdb-precompile.py') . ' --quiet --astdb ' . escapeshellarg($astdb), $output, $exitCode);
+if ($exitCode !== 0) {
+    fwrite(STDERR, "astdb-precompile.py failed\n");
+    exit(1);
+}
+$precompileMs = (microtime(true) - $start) * 1000;
+
+$precompiled = [];
+for ($i = 0; $i < $runs; $i++) {
+    $precompiled[] = run_child($astdb);
+}
+report('precompiled', $precompiled);
+
+printf("\nprecompile (off the request path): %.1f ms\n", $precompileMs);
+printf("cold request speedup: %.1fx\n", median(array_column($lazy, 'load_ms')) / max(0.001, median(array_column($precompiled, 'load_ms'))));
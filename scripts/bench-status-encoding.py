@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Compare rpt status variable sizes for STATUS_FORMAT = html and compact.
+
+Builds cpu_temp / WX / ALERT values with the real formatters in
+ast_node_status_update.py and reports, per node:
+
+  poll       bytes of the three "Var: name=value" lines in each AMI RptStatus
+             XStat response (read by AmiXstatParserService)
+  broadcast  bytes of the NodeWebSocketService JSON frame sent to every
+             browser (json_encode: ASCII-escaped, "/" escaped)
+  alerts     how many alerts fit in ALERT_MAX_LEN
+
+Usage:
+  python3 scripts/bench-status-encoding.py
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "user_files" / "sbin"))
+
+import ast_node_status_update as updater  # noqa: E402
+
+ALERTS = [
+    {"event": "Tornado Warning", "severity": "Extreme"},
+    {"event": "Severe Thunderstorm Warning", "severity": "Severe"},
+    {"event": "Flash Flood Watch", "severity": "Moderate"},
+    {"event": "Heat Advisory", "severity": "Minor"},
+    {"event": "Special Weather Statement", "severity": "Minor"},
+]
+
+SCENARIOS = [
+    ("no alerts", []),
+    ("2 alerts", ALERTS[:2]),
+    ("5 alerts", ALERTS),
+]
+
+
+def _values(fmt: str, alerts: list[dict]) -> dict[str, str]:
+    updater.STATUS_FORMAT = fmt
+    updater._read_cpu_temp_celsius = lambda: 47.8
+    enabled_text, _ = updater._alert_provider_texts("SkywarnPlus-NG")
+    values = {
+        "cpu_temp": updater.get_cpu_temperature("F"),
+        "WX": updater._format_wx("Houston, Texas", "72°F, Partly Cloudy"),
+        "ALERT": updater._format_alert_html(
+            enabled_text, bool(alerts), alerts, updater._alert_state_text("N"), max_len=updater.ALERT_MAX_LEN
+        ),
+    }
+    # rpt stores the value without the quotes used on the asterisk command line
+    return {k: v[1:-1] if v.startswith('"') and v.endswith('"') else v for k, v in values.items()}
+
+
+def _poll_bytes(values: dict[str, str]) -> int:
+    return sum(len(f"Var: {k}={v}\r\n".encode("utf-8")) for k, v in values.items())
+
+
+def _broadcast_bytes(values: dict[str, str]) -> int:
+    frame = {
+        "node": "546051",
+        "timestamp": 1760000000,
+        "status": "online",
+        "cos_keyed": 0,
+        "tx_keyed": 0,
+        "cpu_temp": values["cpu_temp"],
+        "cpu_up": "Up 3 days, 4 hours, 12 minutes",
+        "cpu_load": "Load Average: 0.12, 0.09, 0.08",
+        "ALERT": values["ALERT"],
+        "WX": values["WX"],
+        "DISK": "Disk - 21% Used, 22G remaining",
+        "remote_nodes": [],
+    }
+    # PHP json_encode defaults: \uXXXX for non-ASCII, "\/" for slashes
+    return len(json.dumps(frame, separators=(",", ":")).replace("/", "\\/"))
+
+
+def _alerts_shown(value: str, fmt: str) -> int:
+    if fmt == "compact":
+        return sum(1 for field in value.split("|")[2:] if field[:1].isdigit())
+    return value.count("<b>") - 1
+
+
+def main() -> int:
+    print(f"{'scenario':<10} {'format':<8} {'poll B':>7} {'frame B':>8} {'alerts':>7}")
+    for name, alerts in SCENARIOS:
+        sizes = {}
+        for fmt in ("html", "compact"):
+            values = _values(fmt, alerts)
+            sizes[fmt] = (_poll_bytes(values), _broadcast_bytes(values))
+            print(f"{name:<10} {fmt:<8} {sizes[fmt][0]:>7} {sizes[fmt][1]:>8} "
+                  f"{_alerts_shown(values['ALERT'], fmt):>4}/{len(alerts)}")
+        (poll_h, frame_h), (poll_c, frame_c) = sizes["html"], sizes["compact"]
+        print(f"{'':<10} {'saved':<8} {100 * (1 - poll_c / poll_h):>6.0f}% {100 * (1 - frame_c / frame_h):>7.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
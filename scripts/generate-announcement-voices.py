@@ -126,6 +126,22 @@ def onnx_path(meta: dict) -> str | None:
     return None
 
 
+def model_files(meta: dict) -> dict[str, dict]:
+    """Size and md5 of the .onnx / .onnx.json pair, keyed by file name (used by announce_voices.py)."""
+    out: dict[str, dict] = {}
+    for path, info in meta.get("files", {}).items():
+        if not path.endswith((".onnx", ".onnx.json")) or not isinstance(info, dict):
+            continue
+        entry = {}
+        if isinstance(info.get("size_bytes"), int):
+            entry["size_bytes"] = info["size_bytes"]
+        if info.get("md5_digest"):
+            entry["md5_digest"] = str(info["md5_digest"])
+        if entry:
+            out[path.rsplit("/", 1)[-1]] = entry
+    return out
+
+
 def speaker_label(meta: dict) -> str:
     lang = meta.get("language", {})
     name = str(meta.get("name", "")).replace("_", " ").title()
@@ -172,6 +188,9 @@ def main() -> int:
             "quality": str(meta.get("quality", "")),
             "curated": voice_id in CURATED.get(region, []),
         }
+        files = model_files(meta)
+        if files:
+            voices_out[voice_id]["files"] = files
 
     payload = {
         "catalog_version": "piper-voices",
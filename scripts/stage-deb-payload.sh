@@ -40,7 +40,7 @@ done
 copy_tree user_files user_files
 chmod 755 "$STAGE/user_files/sbin" 2>/dev/null || true
 for script in ast_node_status_update.py din ssinfo dvswitch-bridge-restart.sh \
-    announce-play.sh announce-install.sh announce-tts.sh announce-delete.sh announce-schedule.sh announce-voice-install.sh; do
+    announce-play.sh announce-install.sh announce-tts.sh announce-delete.sh announce-schedule.sh announce-voice-install.sh announce_voices.py announce_tts_cache.py node_metric_history.py node_weather.py offline_geocoder.py announce_transcode.py; do
     [ -f "$STAGE/user_files/sbin/$script" ] && chmod 755 "$STAGE/user_files/sbin/$script" || true
 done
 [ -f "$STAGE/user_files/sbin/node_info.ini" ] && chmod 644 "$STAGE/user_files/sbin/node_info.ini" || true
@@ -91,7 +91,7 @@ mkdir -p "$STAGE/scripts"
 for s in manage_users.php generate_local_allmon.php version-check.sh \
     generate-apache-template.sh configure-apache.sh patch-public-htaccess.sh \
     configure-app-base-path.sh composer-install-production.sh database-auto-update.php \
-    supermon_unified_file_editor.sh; do
+    supermon_unified_file_editor.sh astdb-precompile.py; do
     [ -f "$ROOT/scripts/$s" ] && cp "$ROOT/scripts/$s" "$STAGE/scripts/" || true
 done
 chmod +x "$STAGE/scripts/"*.sh 2>/dev/null || true
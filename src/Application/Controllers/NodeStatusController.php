@@ -94,6 +94,19 @@ class NodeStatusController
                 return ApiResponseHelper::error($response, 'Nodes array is required', 400);
             }
 
+            // Keep [general] keys this form does not manage (LOW_WRITE, METRIC_HISTORY,
+            // GEOCODER, STATUS_FORMAT, ...) instead of dropping them on save
+            $managedKeys = ['NODE', 'WX_USE_GPS', 'WX_CODE', 'WX_LOCATION', 'TEMP_UNIT', 'ALERT_PROVIDER', 'ALERT_PRODUCT'];
+            $existing = is_file($configFile) ? parse_ini_file($configFile, true, INI_SCANNER_RAW) : false;
+            $preservedGeneral = [];
+            if (is_array($existing) && isset($existing['general']) && is_array($existing['general'])) {
+                foreach ($existing['general'] as $key => $value) {
+                    if (!in_array(strtoupper((string) $key), $managedKeys, true) && !is_array($value)) {
+                        $preservedGeneral[$key] = $value;
+                    }
+                }
+            }
+
             $iniContent = "[general]\n";
             $iniContent .= "NODE = " . implode(' ', $data['nodes']) . "\n";
             $iniContent .= "WX_USE_GPS = " . (!empty($data['wx_use_gps']) ? 'yes' : 'no') . "\n";
@@ -109,6 +122,9 @@ class NodeStatusController
             if (!empty($data['alert_product'])) {
                 $iniContent .= "ALERT_PRODUCT = " . (string) $data['alert_product'] . "\n";
             }
+            foreach ($preservedGeneral as $key => $value) {
+                $iniContent .= $key . " = " . $value . "\n";
+            }
             $iniContent .= "\n";
 
             $iniContent .= "[skywarnplus]\n";
@@ -520,7 +520,12 @@ class AstdbCacheService
                 'timestamp' => time(),
                 'file_path' => $this->astdbFile,
                 'compressed' => true, // Mark as compressed
-                'version' => '1.1' // Cache format version
+                'version' => '1.2', // Cache format version
+                'indexes' => [
+                    'callsign' => self::$callsignIndex,
+                    'location' => self::$locationIndex,
+                    'description' => self::$descriptionIndex
+                ]
             ];
             
             // Serialize and compress the data
@@ -532,9 +537,15 @@ class AstdbCacheService
                 return;
             }
             
-            $result = file_put_contents($this->cacheFile, $compressedData, LOCK_EX);
+            // Write to a temp file and rename so readers never see a partial cache
+            $tmpFile = $this->cacheFile . '.' . getmypid() . '.tmp';
+            $result = file_put_contents($tmpFile, $compressedData, LOCK_EX);
+            if ($result !== false && !rename($tmpFile, $this->cacheFile)) {
+                $result = false;
+            }
             
             if ($result === false) {
+                @unlink($tmpFile);
                 $this->logger->warning('Failed to save application cache', ['cache_file' => $this->cacheFile]);
             } else {
                 $originalSize = strlen($serializedData);
@@ -602,6 +613,17 @@ class AstdbCacheService
             self::$applicationCache = $cacheData['data'];
             self::$applicationCacheMtime = $cacheData['mtime'];
             
+            // Version 1.2+ caches (also written by scripts/astdb-precompile.py) carry the search indexes
+            if (isset($cacheData['indexes']['callsign'], $cacheData['indexes']['location'], $cacheData['indexes']['description'])) {
+                self::$callsignIndex = $cacheData['indexes']['callsign'];
+                self::$locationIndex = $cacheData['indexes']['location'];
+                self::$descriptionIndex = $cacheData['indexes']['description'];
+            } else {
+                self::$callsignIndex = null;
+                self::$locationIndex = null;
+                self::$descriptionIndex = null;
+            }
+            
             $this->logger->debug('Application cache loaded', [
                 'cache_file' => $this->cacheFile,
                 'entries_count' => count(self::$applicationCache),
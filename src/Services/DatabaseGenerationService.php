@@ -116,6 +116,9 @@ class DatabaseGenerationService
             
             $this->writeDatabaseFile($finalContent);
             
+            // Build the web app's ASTDB cache now instead of on the first request
+            $this->precompileAstdbCache();
+            
             // Update last generation timestamp
             $this->updateLastGenerationTime();
             
@@ -334,6 +337,44 @@ class DatabaseGenerationService
         ]);
     }
     
+    /**
+     * Precompile cache/astdb_cache.php from the freshly written database
+     *
+     * Runs scripts/astdb-precompile.py, which builds the same node array and
+     * search indexes as AstdbCacheService and atomically replaces the cache.
+     * On failure AstdbCacheService still rebuilds the cache lazily.
+     */
+    private function precompileAstdbCache(): void
+    {
+        $script = __DIR__ . '/../../scripts/astdb-precompile.py';
+        if (!is_file($script)) {
+            return;
+        }
+        
+        $command = 'python3 ' . escapeshellarg($script)
+            . ' --astdb ' . escapeshellarg($this->astdbFile)
+            . ' --cache ' . escapeshellarg(__DIR__ . '/../../cache/astdb_cache.php')
+            . ' 2>&1';
+        
+        $output = [];
+        $exitCode = 0;
+        $startTime = microtime(true);
+        exec($command, $output, $exitCode);
+        
+        if ($exitCode !== 0) {
+            $this->logger->warning('ASTDB cache precompile failed, cache will be built on first request', [
+                'exit_code' => $exitCode,
+                'output' => trim(implode("\n", $output))
+            ]);
+            return;
+        }
+        
+        $this->logger->info('ASTDB cache precompiled', [
+            'duration_ms' => round((microtime(true) - $startTime) * 1000, 2),
+            'output' => trim(implode("\n", $output))
+        ]);
+    }
+    
     /**
      * Get database status information
      */
@@ -41,4 +41,19 @@ final class AmiXstatParserServiceTest extends TestCase
         $this->assertSame('99999', $payload['remote_nodes'][0]['node']);
         $this->assertSame('Info for 99999', $payload['remote_nodes'][0]['info']);
     }
+
+    public function testCompactStatusTokensPassThroughUnchanged(): void
+    {
+        $parser = new AmiXstatParserService();
+        $rpt = "Var: cpu_temp=~T|0|48|C\n"
+            . "Var: WX=~W|Houston, Texas|72°F, Partly Cloudy\n"
+            . "Var: ALERT=~A|S|4Tornado Warning|2Flood Watch\n";
+        $parsed = $parser->parse($rpt, '');
+
+        $payload = $parser->buildWebSocketPayload($parsed, '546051', static fn (string $id): string => $id);
+
+        $this->assertSame('~T|0|48|C', $payload['cpu_temp']);
+        $this->assertSame('~W|Houston, Texas|72°F, Partly Cloudy', $payload['WX']);
+        $this->assertSame('~A|S|4Tornado Warning|2Flood Watch', $payload['ALERT']);
+    }
 }
@@ -0,0 +1,162 @@
+"""announce_transcode.py: u-law encoding, WAV parsing and streaming invariants.
+
+The sox comparison runs only where sox is installed.
+
+Run with: python3 -m unittest discover -s tests -p 'test_*.py'
+"""
+
+import math
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user_files", "sbin"))
+
+import announce_transcode as at  # noqa: E402
+
+
+def _tone(seconds, rate, channels=1):
+    t = np.arange(int(seconds * rate)) / rate
+    mono = 0.45 * np.sin(2 * np.pi * 440 * t) + 0.25 * np.sin(2 * np.pi * 1870 * t)
+    rng = np.random.default_rng(7)
+    frames = np.stack([mono + 0.02 * rng.standard_normal(len(t)) for _ in range(channels)], axis=1)
+    return at.to_int16(frames.reshape(-1))
+
+
+class TranscodeTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def path(self, name):
+        return os.path.join(self.tmp, name)
+
+    def read(self, name):
+        with open(self.path(name), "rb") as f:
+            return f.read()
+
+
+class UlawTableTest(unittest.TestCase):
+    def test_table_matches_scalar_encoder(self):
+        reference = bytes(at.ulaw_encode_scalar(s) for s in range(-32768, 32768))
+        self.assertEqual(at.ulaw_encode(np.arange(-32768, 32768)), reference)
+
+    def test_g711_anchor_codes(self):
+        # Positive zero, full-scale positive and negative (G.711 u-law, bits inverted)
+        codes = at.ulaw_encode(np.array([0, 32767, -32768], dtype=np.int16))
+        self.assertEqual(list(codes), [0xFF, 0x80, 0x00])
+
+    def test_encoding_is_monotonic_and_within_one_step(self):
+        samples = np.arange(-32768, 32768)
+        decoded = at.ulaw_decode(at.ulaw_encode(samples)) * 32768.0
+        self.assertTrue(np.all(np.diff(decoded) >= 0))
+        # Largest u-law step is 1024 (top segment); above 32124 the encoder clips
+        unclipped = np.abs(samples) <= 32124
+        self.assertLessEqual(np.max(np.abs(decoded[unclipped] - samples[unclipped])), 1024)
+
+
+class TranscodeTest(TranscodeTestCase):
+    def test_8khz_mono_passes_through_unchanged(self):
+        samples = _tone(2.0, 8000)
+        at.write_wav(self.path("in.wav"), samples, 8000)
+        written = at.transcode(self.path("in.wav"), self.path("out.ul"))
+        self.assertEqual(written, len(samples))
+        self.assertEqual(self.read("out.ul"), at.ulaw_encode(samples))
+
+    def test_output_is_independent_of_chunk_size(self):
+        for rate, channels in ((44100, 2), (16000, 1)):
+            with self.subTest(rate=rate, channels=channels):
+                samples = _tone(1.5, rate, channels)
+                at.write_wav(self.path("in.wav"), samples, rate, channels)
+                at.transcode(self.path("in.wav"), self.path("whole.ul"))
+                whole = self.read("whole.ul")
+                self.assertEqual(len(whole), math.ceil(len(samples) // channels * 8000 / rate))
+                for chunk_frames in (1, 777, 4096):
+                    at.transcode(self.path("in.wav"), self.path("chunked.ul"), chunk_frames=chunk_frames)
+                    self.assertEqual(self.read("chunked.ul"), whole, f"chunk_frames={chunk_frames}")
+
+    def test_wav_with_odd_length_extra_chunk(self):
+        samples = _tone(0.5, 8000)
+        data = samples.astype("<i2").tobytes()
+        # 18-byte fmt (cbSize = 0) and an odd-length LIST chunk with its pad byte
+        fmt = struct.pack("<HHIIHHH", at.WAVE_FORMAT_PCM, 1, 8000, 16000, 2, 16, 0)
+        extra = b"INFOx"
+        body = (
+            b"WAVE"
+            + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+            + b"LIST" + struct.pack("<I", len(extra)) + extra + b"\0"
+            + b"data" + struct.pack("<I", len(data)) + data
+        )
+        with open(self.path("odd.wav"), "wb") as f:
+            f.write(b"RIFF" + struct.pack("<I", len(body)) + body)
+        at.transcode(self.path("odd.wav"), self.path("odd.ul"))
+        self.assertEqual(self.read("odd.ul"), at.ulaw_encode(samples))
+
+    def test_raw_pcm_matches_wav(self):
+        samples = _tone(0.5, 8000)
+        at.write_wav(self.path("in.wav"), samples, 8000)
+        with open(self.path("in.raw"), "wb") as f:
+            f.write(samples.astype("<i2").tobytes())
+        at.transcode(self.path("in.wav"), self.path("wav.ul"))
+        at.transcode(self.path("in.raw"), self.path("raw.ul"), raw_rate=8000)
+        self.assertEqual(self.read("raw.ul"), self.read("wav.ul"))
+
+    def test_unsupported_input_exits_3_and_leaves_no_output(self):
+        with open(self.path("in.mp3"), "wb") as f:
+            f.write(b"ID3\x03\x00\x00\x00\x00\x00\x00" + b"\xff\xfb" * 64)
+        with self.assertRaises(at.UnsupportedFormat):
+            at.transcode(self.path("in.mp3"), self.path("out.ul"))
+        code = at.main(["convert", self.path("in.mp3"), self.path("out.ul")])
+        self.assertEqual(code, at.EXIT_UNSUPPORTED)
+        self.assertEqual(os.listdir(self.tmp), ["in.mp3"])
+
+
+@unittest.skipUnless(shutil.which("sox"), "sox not installed")
+class SoxComparisonTest(TranscodeTestCase):
+    def _sox(self, src, dest):
+        subprocess.run(
+            ["sox", "-D", self.path(src), "-t", "raw", "-r", "8000", "-c", "1", "-e", "u-law", self.path(dest)],
+            check=True, capture_output=True,
+        )
+
+    def test_bit_exact_with_sox_for_8khz_mono(self):
+        at.write_wav(self.path("in.wav"), _tone(3.0, 8000), 8000)
+        self._sox("in.wav", "sox.ul")
+        at.transcode(self.path("in.wav"), self.path("ours.ul"))
+        self.assertEqual(self.read("ours.ul"), self.read("sox.ul"))
+
+    def test_bit_exact_with_sox_for_raw_8khz(self):
+        samples = _tone(1.0, 8000)
+        with open(self.path("in.raw"), "wb") as f:
+            f.write(samples.astype("<i2").tobytes())
+        subprocess.run(
+            ["sox", "-D", "-t", "raw", "-r", "8000", "-e", "signed", "-b", "16", "-c", "1", self.path("in.raw"),
+             "-t", "raw", "-r", "8000", "-c", "1", "-e", "u-law", self.path("sox.ul")],
+            check=True, capture_output=True,
+        )
+        at.transcode(self.path("in.raw"), self.path("ours.ul"), raw_rate=8000)
+        self.assertEqual(self.read("ours.ul"), self.read("sox.ul"))
+
+    def test_resampled_output_tracks_sox(self):
+        # sox uses a different (equally valid) resampling filter: compare as signals
+        for rate, channels in ((16000, 1), (44100, 2), (48000, 2)):
+            with self.subTest(rate=rate, channels=channels):
+                at.write_wav(self.path("in.wav"), _tone(2.0, rate, channels), rate, channels)
+                self._sox("in.wav", "sox.ul")
+                at.transcode(self.path("in.wav"), self.path("ours.ul"))
+                ours, theirs = at.ulaw_decode(self.read("ours.ul")), at.ulaw_decode(self.read("sox.ul"))
+                self.assertLessEqual(abs(len(ours) - len(theirs)), 2)
+                n = min(len(ours), len(theirs))
+                noise = np.sum((ours[:n] - theirs[:n]) ** 2) or 1e-12
+                self.assertGreater(10 * math.log10(np.sum(theirs[:n] ** 2) / noise), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
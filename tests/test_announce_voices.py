@@ -0,0 +1,244 @@
+"""announce_voices.py against a local Range-capable stand-in for Hugging Face.
+
+Run with: python3 -m unittest discover -s tests -p 'test_*.py'
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user_files", "sbin"))
+
+import announce_voices  # noqa: E402
+
+HF_PATH = "en/en_US/test/medium"
+
+
+def _voice_files(voice_id, size=48 * 1024):
+    model = hashlib.sha256(voice_id.encode()).digest() * (size // 32)
+    config = json.dumps({"voice": voice_id}).encode()
+    return {f"{voice_id}.onnx": model, f"{voice_id}.onnx.json": config}
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    # file name -> bytes; set per test
+    files = {}
+    honor_range = True
+    # file name -> sha256 to advertise instead of the real one
+    etag_override = {}
+    # set to block a transfer until the test releases it
+    gate = None
+    ranges_seen = []
+
+    def do_GET(self):
+        cls = type(self)
+        name = self.path.rsplit("/", 1)[-1]
+        body = cls.files.get(name)
+        if body is None:
+            self.send_error(404)
+            return
+        if cls.gate is not None:
+            cls.gate.wait(10)
+        etag = cls.etag_override.get(name, hashlib.sha256(body).hexdigest())
+        range_header = self.headers.get("Range")
+        cls.ranges_seen.append((name, range_header))
+        start = 0
+        if range_header and cls.honor_range:
+            start = int(range_header.split("=", 1)[1].split("-", 1)[0])
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        payload = body[start:]
+        self.send_header("X-Linked-Etag", f'"{etag}"')
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AnnounceVoicesStandInTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.voices_dir = Path(tmp.name)
+        self.store = announce_voices.VoiceStore(self.voices_dir).__enter__()
+        _StandInHandler.files = {}
+        _StandInHandler.honor_range = True
+        _StandInHandler.etag_override = {}
+        _StandInHandler.gate = None
+        _StandInHandler.ranges_seen = []
+
+    def _serve(self, *voice_ids):
+        for voice_id in voice_ids:
+            _StandInHandler.files.update(_voice_files(voice_id))
+
+    def _install(self, *voice_ids, catalog=None):
+        requested = {voice_id: HF_PATH for voice_id in voice_ids}
+        return announce_voices.install_voices(self.store, requested, catalog or {}, self.base_url, 2, 10.0)
+
+    def _assert_installed(self, voice_id):
+        for name, body in _voice_files(voice_id).items():
+            self.assertEqual((self.voices_dir / name).read_bytes(), body)
+        self.assertIn(voice_id, self.store.load_index()["voices"])
+
+    def _seed_partial(self, voice_id, length):
+        name = f"{voice_id}.onnx"
+        part = self.store.partial_path(voice_id, name)
+        part.parent.mkdir(parents=True, exist_ok=True)
+        part.write_bytes(_voice_files(voice_id)[name][:length])
+        return name
+
+    def test_fresh_install_links_store_objects(self):
+        self._serve("en_US-a")
+        installed, errors = self._install("en_US-a")
+        self.assertEqual((installed, errors), (["en_US-a"], {}))
+        self._assert_installed("en_US-a")
+        digest = hashlib.sha256(_voice_files("en_US-a")["en_US-a.onnx"]).hexdigest()
+        self.assertEqual(
+            (self.voices_dir / "en_US-a.onnx").stat().st_ino,
+            self.store.object_path(digest).stat().st_ino,
+        )
+        self.assertFalse((self.store.partial / "en_US-a").exists())
+
+    def test_resume_with_206(self):
+        self._serve("en_US-a")
+        name = self._seed_partial("en_US-a", 10000)
+        installed, errors = self._install("en_US-a")
+        self.assertEqual(errors, {})
+        self.assertIn((name, "bytes=10000-"), _StandInHandler.ranges_seen)
+        self._assert_installed("en_US-a")
+
+    def test_restart_when_range_is_ignored(self):
+        self._serve("en_US-a")
+        _StandInHandler.honor_range = False
+        name = self._seed_partial("en_US-a", 10000)
+        installed, errors = self._install("en_US-a")
+        self.assertEqual(errors, {})
+        self.assertIn((name, "bytes=10000-"), _StandInHandler.ranges_seen)
+        self._assert_installed("en_US-a")
+
+    def test_complete_partial_verified_after_416(self):
+        self._serve("en_US-a")
+        name = "en_US-a.onnx"
+        self._seed_partial("en_US-a", len(_voice_files("en_US-a")[name]))
+        installed, errors = self._install("en_US-a")
+        self.assertEqual(errors, {})
+        self._assert_installed("en_US-a")
+
+    def test_sha256_mismatch_is_rejected(self):
+        self._serve("en_US-a")
+        _StandInHandler.etag_override = {"en_US-a.onnx": "0" * 64}
+        installed, errors = self._install("en_US-a")
+        self.assertEqual(installed, [])
+        self.assertIn("sha256 mismatch", errors["en_US-a"])
+        self.assertFalse((self.voices_dir / "en_US-a.onnx").exists())
+        self.assertFalse((self.voices_dir / "en_US-a.onnx.json").exists())
+        self.assertEqual(list(self.store.objects.iterdir()), [])
+        self.assertNotIn("en_US-a", self.store.load_index()["voices"])
+
+    def test_catalog_size_and_md5_mismatch_are_rejected(self):
+        self._serve("en_US-a")
+        body = _voice_files("en_US-a")["en_US-a.onnx"]
+        for info, problem in (
+            ({"size_bytes": len(body) + 1}, "size"),
+            ({"size_bytes": len(body), "md5_digest": "0" * 32}, "md5 mismatch"),
+        ):
+            with self.subTest(problem=problem):
+                catalog = {"en_US-a": {"files": {"en_US-a.onnx": info}}}
+                installed, errors = self._install("en_US-a", catalog=catalog)
+                self.assertEqual(installed, [])
+                self.assertIn(problem, errors["en_US-a"])
+                self.assertFalse((self.voices_dir / "en_US-a.onnx").exists())
+
+    def test_catalog_size_and_md5_match(self):
+        self._serve("en_US-a")
+        body = _voice_files("en_US-a")["en_US-a.onnx"]
+        catalog = {"en_US-a": {"files": {"en_US-a.onnx": {
+            "size_bytes": len(body),
+            "md5_digest": hashlib.md5(body).hexdigest(),
+        }}}}
+        installed, errors = self._install("en_US-a", catalog=catalog)
+        self.assertEqual(errors, {})
+        self._assert_installed("en_US-a")
+
+    def test_lru_eviction_keeps_pinned_and_just_installed(self):
+        self._serve("en_US-old", "en_US-pinned", "en_US-mid", "en_US-new")
+        self._install("en_US-old", "en_US-pinned", "en_US-mid")
+        index = self.store.load_index()
+        for voice_id, last_used in (("en_US-pinned", 100), ("en_US-old", 200), ("en_US-mid", 300)):
+            index["voices"][voice_id]["last_used"] = last_used
+        self.store.save_index(index)
+
+        installed, errors = self._install("en_US-new")
+        self.assertEqual(errors, {})
+        voices = self.store.load_index()["voices"]
+        # Room for exactly the pinned voice and the one just installed
+        budget = voices["en_US-pinned"]["size"] + voices["en_US-new"]["size"]
+        evicted = announce_voices.evict(self.store, budget, {"en_US-pinned"}, keep=set(installed))
+
+        self.assertEqual(evicted, ["en_US-old", "en_US-mid"])
+        remaining = set(self.store.load_index()["voices"])
+        self.assertEqual(remaining, {"en_US-pinned", "en_US-new"})
+        self.assertFalse((self.voices_dir / "en_US-old.onnx").exists())
+        self.assertLessEqual(self.store.disk_usage(), budget)
+
+    def test_store_lock_is_not_held_during_download(self):
+        self._serve("en_US-a")
+        _StandInHandler.gate = threading.Event()
+        result = {}
+        worker = threading.Thread(target=lambda: result.update(out=self._install("en_US-a")))
+        worker.start()
+        try:
+            deadline = time.time() + 5
+            while not (self.store.partial / "en_US-a").exists() and time.time() < deadline:
+                time.sleep(0.01)
+            with self.store.locked(blocking=False) as acquired:
+                self.assertTrue(acquired)
+        finally:
+            _StandInHandler.gate.set()
+            worker.join(10)
+        self.assertEqual(result["out"][1], {})
+        self._assert_installed("en_US-a")
+
+    def test_touch_skips_when_store_is_busy(self):
+        self._serve("en_US-a")
+        self._install("en_US-a")
+        before = self.store.load_index()["voices"]["en_US-a"]["last_used"]
+        with self.store.locked():
+            started = time.monotonic()
+            self.assertTrue(announce_voices.touch(self.store, "en_US-a"))
+            self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(self.store.load_index()["voices"]["en_US-a"]["last_used"], before)
+        self.assertTrue(announce_voices.touch(self.store, "en_US-a"))
+        self.assertGreater(self.store.load_index()["voices"]["en_US-a"]["last_used"], before)
+
+
+if __name__ == "__main__":
+    unittest.main()
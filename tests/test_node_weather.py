@@ -0,0 +1,136 @@
+"""node_weather.py against a local stand-in for Open-Meteo and aviationweather.gov.
+
+Run with: python3 -m unittest discover -s tests -p 'test_*.py'
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user_files", "sbin"))
+
+import ast_node_status_update as updater  # noqa: E402
+import node_weather  # noqa: E402
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    # path -> (status, body); set per test
+    routes = {}
+    requests_seen = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        type(self).requests_seen.append((url.path, parse_qs(url.query)))
+        status, body = type(self).routes.get(url.path, (404, {"error": "not found"}))
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NodeWeatherStandInTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        env = mock.patch.dict(os.environ, {
+            "SUPERMON_WEATHER_GEOCODE_URL": f"{self.base}/geocode",
+            "SUPERMON_WEATHER_FORECAST_URL": f"{self.base}/forecast",
+            "SUPERMON_WEATHER_METAR_URL": f"{self.base}/metar",
+            "SUPERMON_WEATHER_CACHE_DIR": self.tmp.name,
+            "WEATHER_CONFIG": os.path.join(self.tmp.name, "weather.ini"),
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        node_weather._session = None
+        _StandInHandler.routes = {
+            "/geocode": (200, {"results": [{"latitude": 29.76, "longitude": -95.37}]}),
+            "/forecast": (200, {"current": {"temperature_2m": 22.2, "weather_code": 2}}),
+            "/metar": (200, [{"temp": 25.0, "rawOb": "KHOU 191753Z 18010KT 10SM -RA BKN030 25/20 A2992"}]),
+        }
+        _StandInHandler.requests_seen = []
+
+    def _write_ini(self, text):
+        with open(os.environ["WEATHER_CONFIG"], "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_openmeteo_postal_code(self):
+        self.assertEqual(node_weather.lookup("77002"), "72°F, Partly Cloudy")
+        paths = [path for path, _ in _StandInHandler.requests_seen]
+        self.assertEqual(paths, ["/geocode", "/forecast"])
+        self.assertEqual(_StandInHandler.requests_seen[0][1]["countryCode"], ["US"])
+
+    def test_openmeteo_geocode_is_cached(self):
+        node_weather.lookup("77002")
+        node_weather.lookup("77002")
+        paths = [path for path, _ in _StandInHandler.requests_seen]
+        self.assertEqual(paths.count("/geocode"), 1)
+
+    def test_openmeteo_coordinates_celsius_without_condition(self):
+        self._write_ini("[weather]\nTemperature_mode = C\nprocess_condition = NO\n")
+        self.assertEqual(node_weather.lookup(lat=29.76, lon=-95.37), "22°C")
+        self.assertEqual([path for path, _ in _StandInHandler.requests_seen], ["/forecast"])
+
+    def test_metar_precipitation_and_sky_cover(self):
+        self.assertEqual(node_weather.lookup("KHOU"), "77°F, Rain")
+        _StandInHandler.routes["/metar"] = (200, [{"temp": 10.0, "rawOb": "KHOU 191753Z 00000KT 10SM FEW250 10/02 A3012"}])
+        self.assertEqual(node_weather.lookup("khou"), "50°F, Mostly Clear")
+        self.assertEqual(_StandInHandler.requests_seen[0][1]["ids"], ["KHOU"])
+
+    def test_malformed_metar_falls_through_to_openmeteo(self):
+        _StandInHandler.routes["/metar"] = (200, ["KHOU 191753Z 18010KT"])
+        self.assertEqual(node_weather.lookup("KHOU"), "72°F, Partly Cloudy")
+
+    def test_broken_backend_returns_none(self):
+        def broken(code, settings, lat=None, lon=None):
+            raise RuntimeError("backend bug")
+
+        with mock.patch.dict(node_weather.BACKENDS, {"openmeteo": broken, "metar": broken}):
+            self.assertIsNone(node_weather.lookup("KHOU"))
+
+    def test_updater_falls_back_to_weather_scripts(self):
+        _StandInHandler.routes = {
+            "/geocode": (500, {"error": "down"}),
+            "/metar": (200, b"not json"),
+        }
+
+        def script_exists(path, mode):
+            return path == "/usr/sbin/weather.rb"
+
+        with mock.patch.object(updater.os, "access", side_effect=script_exists), \
+                mock.patch.object(updater, "run_weather_command", return_value="70°F, Clear") as run:
+            wx = updater.get_weather("77002", "Houston, Texas")
+        run.assert_called_once_with(["/usr/sbin/weather.rb", "77002", "v"])
+        self.assertIn("Houston, Texas", wx)
+        self.assertIn("70°F, Clear", wx)
+
+    def test_updater_skips_scripts_when_native_succeeds(self):
+        with mock.patch.object(updater, "run_weather_command") as run:
+            wx = updater.get_weather("77002", "Houston, Texas")
+        run.assert_not_called()
+        self.assertIn("72°F, Partly Cloudy", wx)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -48,13 +48,19 @@ if [[ "$INPUT" == *.ul ]]; then
     exit 0
 fi
 
-if ! command -v sox >/dev/null 2>&1; then
+# WAV is transcoded in-process (announce_transcode.py, needs python3-numpy);
+# MP3 and other formats go straight to sox without starting Python.
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+TRANSCODER="$SCRIPT_DIR/announce_transcode.py"
+if [[ "$INPUT" == *.[wW][aA][vV] && -f "$TRANSCODER" ]] && python3 "$TRANSCODER" convert "$INPUT" "$UL_LOCAL" >/dev/null 2>&1; then
+    :
+elif command -v sox >/dev/null 2>&1; then
+    sox "$INPUT" -t raw -r 8000 -c 1 -e u-law "$UL_LOCAL"
+else
     echo "sox is not installed" >&2
     exit 1
 fi
 
-sox "$INPUT" -t raw -r 8000 -c 1 -e u-law "$UL_LOCAL"
-
 install -m 644 -o root -g root "$UL_LOCAL" "$UL_DEST"
 rm -f "$INPUT"
 
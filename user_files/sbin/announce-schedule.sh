@@ -51,6 +51,11 @@ lock_crontab() {
     fi
 }
 
+# Release the crontab lock early, before slow work such as TTS pre-rendering.
+unlock_crontab() {
+    exec 9>&- 2>/dev/null || true
+}
+
 parse_entries() {
     local line comment="" last_comment="" enabled=1
     while IFS= read -r line || [[ -n "$line" ]]; do
@@ -111,6 +116,14 @@ parse_entries() {
     done
 }
 
+# Install (or re-render) the announcement now so cron playback never waits on TTS.
+prerender_file() {
+    local cache="${SCRIPT_DIR}/announce_tts_cache.py"
+    [[ -f "$cache" ]] || return 0
+    "$PYTHON" "$cache" prerender --name "$1" --node "$2" >/dev/null 2>&1 || \
+        echo "Warning: ${1}.ul is not installed yet; playback will fail until it is" >&2
+}
+
 cmd_list() {
     local entries=()
     local first=1
@@ -198,6 +211,8 @@ cmd_add() {
     printf '%s\n%s\n' "$comment_line" "$cron_line" >> "$tmp"
     write_crontab "$tmp"
     rm -f "$tmp"
+    unlock_crontab
+    prerender_file "$file" "$node"
     echo "Schedule added"
 }
 
@@ -213,7 +228,7 @@ cmd_toggle() {
     [[ -n "$target_id" && ( "$enable" == "0" || "$enable" == "1" ) ]] || usage
 
     lock_crontab
-    local tmp found=0
+    local tmp found=0 enabled_line=""
     tmp=$(mktemp)
     while IFS= read -r line || [[ -n "$line" ]]; do
         line="${line//$'\r'/}"
@@ -237,6 +252,7 @@ cmd_toggle() {
                     printf '%s\n' "$trimmed" >> "$tmp"
                     if [[ "$enable" == "1" ]]; then
                         printf '%s\n' "$uncommented" >> "$tmp"
+                        enabled_line="$uncommented"
                     else
                         printf '# %s\n' "$uncommented" >> "$tmp"
                     fi
@@ -254,6 +270,14 @@ cmd_toggle() {
     [[ $found -eq 1 ]] || { echo "Schedule not found" >&2; rm -f "$tmp"; exit 1; }
     write_crontab "$tmp"
     rm -f "$tmp"
+    unlock_crontab
+    # Re-enabled: the .ul may have been deleted or evicted from the TTS cache meanwhile
+    if [[ "$enabled_line" =~ --node[[:space:]]+([0-9]+) ]]; then
+        local node="${BASH_REMATCH[1]}"
+        if [[ "$enabled_line" =~ --file[[:space:]]+announcements/([a-zA-Z0-9._-]+) ]]; then
+            prerender_file "${BASH_REMATCH[1]}" "$node"
+        fi
+    fi
     echo "Schedule updated"
 }
 
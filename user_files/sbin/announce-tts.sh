@@ -45,24 +45,43 @@ fi
 [[ -d "$MP3_DIR" ]] || mkdir -p "$MP3_DIR"
 [[ -d "$SOUNDS_DIR" ]] || mkdir -p "$SOUNDS_DIR"
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+RENDER_CACHE="$SCRIPT_DIR/announce_tts_cache.py"
 UL_BASE="${MP3_DIR}/${NAME}"
 UL_OUT="${UL_BASE}.ul"
 TEXT=$(cat "$TEXT_FILE")
-rm -f "$TEXT_FILE"
 rm -f "$UL_OUT"
 
-if [[ -n "$VOICE" ]]; then
-    "$TTS_CMD" -n "$NODE" -t "$TEXT" -v "$VOICE" -f "$UL_BASE"
-else
-    "$TTS_CMD" -n "$NODE" -t "$TEXT" -f "$UL_BASE"
+# Identical text + voice was rendered before: reuse the finished ulaw and skip Piper.
+CACHE_HIT=0
+if [[ -f "$RENDER_CACHE" ]] && python3 "$RENDER_CACHE" get --text-file "$TEXT_FILE" --voice "$VOICE" --name "$NAME" --out "$UL_OUT" >/dev/null 2>&1; then
+    CACHE_HIT=1
 fi
 
-if [[ ! -f "$UL_OUT" ]]; then
-    echo "TTS did not produce output" >&2
-    exit 1
+if [[ $CACHE_HIT -eq 0 ]]; then
+    if [[ -n "$VOICE" ]]; then
+        "$TTS_CMD" -n "$NODE" -t "$TEXT" -v "$VOICE" -f "$UL_BASE"
+    else
+        "$TTS_CMD" -n "$NODE" -t "$TEXT" -f "$UL_BASE"
+    fi
+
+    if [[ ! -f "$UL_OUT" ]]; then
+        rm -f "$TEXT_FILE"
+        echo "TTS did not produce output" >&2
+        exit 1
+    fi
+
+    if [[ -f "$RENDER_CACHE" ]]; then
+        python3 "$RENDER_CACHE" put --text-file "$TEXT_FILE" --voice "$VOICE" --name "$NAME" --input "$UL_OUT" >/dev/null 2>&1 || true
+    fi
+fi
+rm -f "$TEXT_FILE"
+
+# Keep the voice store's LRU order current (no-op for hand-installed voices)
+if [[ -n "$VOICE" && -f "$SCRIPT_DIR/announce_voices.py" ]]; then
+    python3 "$SCRIPT_DIR/announce_voices.py" touch "$VOICE" >/dev/null 2>&1 || true
 fi
 
-SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 "$SCRIPT_DIR/announce-install.sh" \
     --input "$UL_OUT" \
     --name "$NAME" \
@@ -28,11 +28,6 @@ done
 [[ "$VOICE_ID" =~ ^[a-zA-Z0-9._-]+$ ]] || { echo "Invalid voice id" >&2; exit 1; }
 [[ "$HF_PATH" =~ ^[a-zA-Z0-9._/-]+$ ]] || { echo "Invalid huggingface path" >&2; exit 1; }
 
-if ! command -v wget >/dev/null 2>&1; then
-    echo "wget is not installed" >&2
-    exit 1
-fi
-
 mkdir -p "$VOICES_DIR"
 
 ONNX="${VOICES_DIR}/${VOICE_ID}.onnx"
@@ -43,6 +38,20 @@ if [[ -f "$ONNX" && -f "$JSON" ]]; then
     exit 0
 fi
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+MANAGER="$SCRIPT_DIR/announce_voices.py"
+
+# Parallel, resumable, checksummed download into the content-addressed voice
+# store (with LRU eviction); the wget path below is kept for hosts without it.
+if command -v python3 >/dev/null 2>&1 && [[ -f "$MANAGER" ]] && python3 -c 'import requests' >/dev/null 2>&1; then
+    exec python3 "$MANAGER" --voices-dir "$VOICES_DIR" install --huggingface-path "$HF_PATH" "$VOICE_ID"
+fi
+
+if ! command -v wget >/dev/null 2>&1; then
+    echo "wget is not installed" >&2
+    exit 1
+fi
+
 TMP_ONNX="$(mktemp)"
 TMP_JSON="$(mktemp)"
 trap 'rm -f "$TMP_ONNX" "$TMP_JSON"' EXIT
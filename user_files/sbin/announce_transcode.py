@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""In-process WAV/PCM to G.711 u-law transcoder for announcements.
+
+Does what `sox INPUT -t raw -r 8000 -c 1 -e u-law OUTPUT` does for WAV and
+raw PCM input, without starting sox: channels are averaged to mono, the
+signal is resampled to 8 kHz with a Kaiser-windowed polyphase low-pass
+filter, and samples are encoded through a 64K-entry u-law table built with
+NumPy. Input is processed in fixed-size chunks, so memory use does not grow
+with announcement length.
+
+The u-law encoder reproduces SoX's encoder (16-bit sample >> 2, then the
+G.711 segment search) bit for bit. Unlike sox, no dither is added, so output
+matches `sox -D`. Formats this module cannot decode (MP3, ...) exit with
+status 3 so announce-install.sh can fall back to sox.
+
+Usage:
+  announce_transcode.py convert INPUT OUTPUT.ul [--raw-rate HZ --raw-channels N]
+  announce_transcode.py batch DIR [--jobs N] [--force] [--remove-source]
+  announce_transcode.py verify [--sox]
+  announce_transcode.py bench [--seconds N] [--rate HZ] [--channels N] [--sox]
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fractions import Fraction
+
+import numpy as np
+
+OUT_RATE = 8000
+CHUNK_FRAMES = 64 * 1024
+# Filter length in zero crossings per side, and passband edge as a fraction
+# of the output Nyquist frequency.
+FILTER_ZEROS = 16
+FILTER_ROLLOFF = 0.92
+KAISER_BETA = 8.6
+
+EXIT_UNSUPPORTED = 3
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# SoX g711.c: 14-bit magnitude clip, bias and segment end points
+ULAW_CLIP = 8159
+ULAW_BIAS = 0x84 >> 2
+ULAW_SEG_END = (0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF)
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# u-law encoding
+# ---------------------------------------------------------------------------
+
+def ulaw_encode_scalar(sample: int) -> int:
+    """Reference encoder for one signed 16-bit sample (SoX sox_14linear2ulaw)."""
+    pcm = sample >> 2
+    if pcm < 0:
+        pcm, mask = -pcm, 0x7F
+    else:
+        mask = 0xFF
+    pcm = min(pcm, ULAW_CLIP) + ULAW_BIAS
+    seg = next((i for i, end in enumerate(ULAW_SEG_END) if pcm <= end), 8)
+    if seg >= 8:
+        return 0x7F ^ mask
+    return ((seg << 4) | ((pcm >> (seg + 1)) & 0x0F)) ^ mask
+
+
+def _build_ulaw_table() -> np.ndarray:
+    samples = np.arange(-32768, 32768, dtype=np.int32)
+    pcm = samples >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    pcm = np.minimum(np.abs(pcm), ULAW_CLIP) + ULAW_BIAS
+    seg = np.searchsorted(np.array(ULAW_SEG_END), pcm, side="left")
+    uval = np.where(seg >= 8, 0x7F, (seg << 4) | ((pcm >> (seg + 1)) & 0x0F))
+    return (uval ^ mask).astype(np.uint8)
+
+
+ULAW_TABLE = _build_ulaw_table()
+
+
+def ulaw_encode(samples: np.ndarray) -> bytes:
+    """Encode int16 samples to u-law bytes with one table lookup per sample."""
+    return ULAW_TABLE[samples.astype(np.int32) + 32768].tobytes()
+
+
+def to_int16(signal: np.ndarray) -> np.ndarray:
+    """Float samples in [-1, 1) to int16, rounded and clipped."""
+    return np.clip(np.rint(signal * 32768.0), -32768, 32767).astype(np.int16)
+
+
+# ---------------------------------------------------------------------------
+# Resampling
+# ---------------------------------------------------------------------------
+
+class Resampler:
+    """Streaming rational-ratio polyphase resampler.
+
+    Output sample n sits at input position n * down / up. Its value is the
+    dot product of the K input samples around that position with one of `up`
+    precomputed filter phases, so each chunk is a single gather + einsum.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int = OUT_RATE):
+        ratio = Fraction(out_rate, in_rate)
+        self.up, self.down = ratio.numerator, ratio.denominator
+        self.passthrough = self.up == self.down == 1
+        if self.passthrough:
+            return
+        span = max(self.up, self.down)
+        cutoff = FILTER_ROLLOFF * 0.5 / span  # cycles per upsampled sample
+        self.half = int(math.ceil(FILTER_ZEROS * span / FILTER_ROLLOFF))
+        self.taps = 2 * self.half // self.up + 1
+        phases = np.arange(self.up)[:, None]
+        offsets = self.half - phases - np.arange(self.taps)[None, :] * self.up
+        window = np.kaiser(2 * self.half + 1, KAISER_BETA)
+        inside = np.abs(offsets) <= self.half
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * offsets) * window[np.clip(offsets + self.half, 0, 2 * self.half)]
+        self.coef = np.where(inside, kernel * self.up, 0.0)
+        # Input buffer; buf[0] is absolute input index buf_start. Leading
+        # zeros stand in for the samples before the start of the stream.
+        self.buf = np.zeros(self.taps)
+        self.buf_start = -self.taps
+        self.total_in = 0
+        self.next_out = 0
+
+    def _first_input(self, n: np.ndarray) -> np.ndarray:
+        return -((self.half - n * self.down) // self.up)
+
+    def _run(self, n_end: int) -> np.ndarray:
+        n = np.arange(self.next_out, n_end, dtype=np.int64)
+        if n.size == 0:
+            return np.zeros(0)
+        first = self._first_input(n)
+        phase = first * self.up - n * self.down + self.half
+        windows = np.lib.stride_tricks.sliding_window_view(self.buf, self.taps)[first - self.buf_start]
+        out = np.einsum("ij,ij->i", windows, self.coef[phase])
+        self.next_out = n_end
+        keep_from = int(self._first_input(np.int64(n_end))) - self.buf_start
+        if keep_from > 0:
+            self.buf = self.buf[keep_from:]
+            self.buf_start += keep_from
+        return out
+
+    def _ready(self) -> int:
+        """Outputs whose whole input window is already buffered."""
+        last_in = self.buf_start + len(self.buf) - 1
+        # largest n with first_input(n) + taps - 1 <= last_in
+        return max(self.next_out, ((last_in - self.taps + 1) * self.up + self.half) // self.down + 1)
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        if self.passthrough:
+            return chunk
+        self.buf = np.concatenate((self.buf, chunk))
+        self.total_in += len(chunk)
+        return self._run(self._ready())
+
+    def flush(self) -> np.ndarray:
+        if self.passthrough:
+            return np.zeros(0)
+        total_out = -((-self.total_in * self.up) // self.down)
+        self.buf = np.concatenate((self.buf, np.zeros(self.taps)))
+        return self._run(max(self.next_out, total_out))
+
+
+# ---------------------------------------------------------------------------
+# Input decoding
+# ---------------------------------------------------------------------------
+
+class PcmReader:
+    """Chunked reader yielding float64 mono blocks from WAV or raw s16le PCM."""
+
+    def __init__(self, path: str, raw_rate: int | None = None, raw_channels: int = 1):
+        self.f = open(path, "rb")
+        if raw_rate:
+            self.rate, self.channels = raw_rate, raw_channels
+            self.fmt, self.width = WAVE_FORMAT_PCM, 2
+            self.remaining = None
+            return
+        try:
+            self._parse_wav_header()
+        except Exception:
+            self.f.close()
+            raise
+
+    def _parse_wav_header(self):
+        riff = self.f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise UnsupportedFormat("not a RIFF/WAVE file")
+        fmt = None
+        while True:
+            header = self.f.read(8)
+            if len(header) < 8:
+                raise UnsupportedFormat("no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = self.f.read(size + (size & 1))
+                fmt_tag, channels, rate, _, block_align, bits = struct.unpack_from("<HHIIHH", body)
+                if fmt_tag == WAVE_FORMAT_EXTENSIBLE and size >= 40:
+                    fmt_tag = struct.unpack_from("<H", body, 24)[0]
+                fmt = (fmt_tag, channels, rate, block_align, bits)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise UnsupportedFormat("data chunk before fmt chunk")
+                break
+            else:
+                self.f.seek(size + (size & 1), os.SEEK_CUR)
+        self.fmt, self.channels, self.rate, block_align, bits = fmt
+        self.width = block_align // max(1, self.channels)
+        supported = {
+            WAVE_FORMAT_PCM: (1, 2, 3, 4),
+            WAVE_FORMAT_IEEE_FLOAT: (4, 8),
+        }
+        if self.width not in supported.get(self.fmt, ()) or self.channels < 1 or self.rate < 1:
+            raise UnsupportedFormat(f"WAV format {self.fmt:#x}, {bits}-bit, {self.channels} ch")
+        # 0 / 0xFFFFFFFF sizes come from streaming writers: read to EOF
+        self.remaining = size if 0 < size < 0xFFFFFFFF else None
+
+    def _decode(self, raw: bytes) -> np.ndarray:
+        w = self.width
+        if self.fmt == WAVE_FORMAT_IEEE_FLOAT:
+            return np.frombuffer(raw, dtype="<f4" if w == 4 else "<f8").astype(np.float64)
+        if w == 1:
+            return (np.frombuffer(raw, dtype=np.uint8).astype(np.float64) - 128.0) / 128.0
+        if w == 2:
+            return np.frombuffer(raw, dtype="<i2") / 32768.0
+        if w == 3:
+            b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            v = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+            return np.where(v >= 1 << 23, v - (1 << 24), v) / float(1 << 23)
+        return np.frombuffer(raw, dtype="<i4") / float(1 << 31)
+
+    def chunks(self, frames: int = CHUNK_FRAMES):
+        block = self.width * self.channels
+        with self.f:
+            while True:
+                want = frames * block
+                if self.remaining is not None:
+                    want = min(want, self.remaining)
+                if want <= 0:
+                    return
+                raw = self.f.read(want)
+                raw = raw[: len(raw) - len(raw) % block]
+                if not raw:
+                    return
+                if self.remaining is not None:
+                    self.remaining -= len(raw)
+                samples = self._decode(raw)
+                if self.channels > 1:
+                    samples = samples.reshape(-1, self.channels).mean(axis=1)
+                yield samples
+
+
+def transcode(src: str, dest: str, raw_rate: int | None = None, raw_channels: int = 1,
+              chunk_frames: int = CHUNK_FRAMES) -> int:
+    """Convert src to raw 8 kHz mono u-law at dest (atomically); returns samples written."""
+    reader = PcmReader(src, raw_rate, raw_channels)
+    resampler = Resampler(reader.rate)
+    written = 0
+    fd, tmp = tempfile.mkstemp(prefix=".transcode-", dir=os.path.dirname(os.path.abspath(dest)))
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in reader.chunks(chunk_frames):
+                encoded = ulaw_encode(to_int16(resampler.process(chunk)))
+                out.write(encoded)
+                written += len(encoded)
+            encoded = ulaw_encode(to_int16(resampler.flush()))
+            out.write(encoded)
+            written += len(encoded)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, dest)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Batch, verification and benchmarks
+# ---------------------------------------------------------------------------
+
+def _batch_one(src: str, dest: str, remove_source: bool) -> tuple[str, str | None]:
+    try:
+        transcode(src, dest)
+    except (OSError, ValueError) as e:
+        return src, str(e)
+    if remove_source:
+        os.unlink(src)
+    return src, None
+
+
+def batch(directory: str, jobs: int | None = None, force: bool = False, remove_source: bool = False) -> int:
+    """Transcode every *.wav in directory whose .ul is missing or older; returns failures."""
+    work = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".wav"):
+            continue
+        src = os.path.join(directory, name)
+        dest = os.path.splitext(src)[0] + ".ul"
+        if not force and os.path.exists(dest) and os.path.getmtime(dest) >= os.path.getmtime(src):
+            continue
+        work.append((src, dest))
+    if not work:
+        print("Nothing to transcode")
+        return 0
+    failures = 0
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(_batch_one, src, dest, remove_source) for src, dest in work]
+        for future in as_completed(futures):
+            src, error = future.result()
+            if error:
+                failures += 1
+                print(f"FAIL {os.path.basename(src)}: {error}", file=sys.stderr)
+            else:
+                print(f"ok   {os.path.basename(src)}")
+    print(f"Transcoded {len(work) - failures}/{len(work)} files in {time.monotonic() - started:.2f}s")
+    return failures
+
+
+def write_wav(path: str, samples: np.ndarray, rate: int, channels: int = 1):
+    """Write interleaved int16 samples as a PCM WAV file."""
+    data = samples.astype("<i2").tobytes()
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", 36 + len(data)) + b"WAVE")
+        f.write(b"fmt " + struct.pack("<IHHIIHH", 16, WAVE_FORMAT_PCM, channels, rate, rate * channels * 2, channels * 2, 16))
+        f.write(b"data" + struct.pack("<I", len(data)))
+        f.write(data)
+
+
+def _test_signal(seconds: float, rate: int, channels: int) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    mono = 0.45 * np.sin(2 * np.pi * 440 * t) + 0.25 * np.sin(2 * np.pi * 1870 * t) + 0.1 * np.sin(2 * np.pi * 6100 * t)
+    rng = np.random.default_rng(1)
+    frames = np.stack([mono + 0.02 * rng.standard_normal(len(t)) for _ in range(channels)], axis=1)
+    return to_int16(frames.reshape(-1))
+
+
+def _sox(src: str, dest: str):
+    subprocess.run(["sox", "-D", src, "-t", "raw", "-r", str(OUT_RATE), "-c", "1", "-e", "u-law", dest],
+                   check=True, capture_output=True)
+
+
+def verify(use_sox: bool = False) -> int:
+    """Bit-exactness checks; returns the number of failed checks."""
+    failures = 0
+    reference = bytes(ulaw_encode_scalar(s) for s in range(-32768, 32768))
+    ok = ulaw_encode(np.arange(-32768, 32768)) == reference
+    print(f"{'ok  ' if ok else 'FAIL'} u-law table matches scalar G.711 encoder for all 65536 inputs")
+    failures += not ok
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 8 kHz mono needs no resampling: output must be the table applied to the input
+        samples = _test_signal(3.0, OUT_RATE, 1)
+        wav, ul = os.path.join(tmp, "in.wav"), os.path.join(tmp, "out.ul")
+        write_wav(wav, samples, OUT_RATE)
+        transcode(wav, ul)
+        with open(ul, "rb") as f:
+            ok = f.read() == ulaw_encode(samples)
+        print(f"{'ok  ' if ok else 'FAIL'} 8 kHz mono WAV passes through unchanged")
+        failures += not ok
+
+        # Chunking must not change the result
+        samples = _test_signal(2.0, 44100, 2)
+        write_wav(wav, samples, 44100, 2)
+        transcode(wav, ul)
+        with open(ul, "rb") as f:
+            whole = f.read()
+        transcode(wav, ul, chunk_frames=777)
+        with open(ul, "rb") as f:
+            ok = f.read() == whole and len(whole) == math.ceil(len(samples) // 2 * OUT_RATE / 44100)
+        print(f"{'ok  ' if ok else 'FAIL'} 44.1 kHz stereo output is identical for any chunk size")
+        failures += not ok
+
+        if use_sox:
+            if not shutil.which("sox"):
+                print("FAIL sox comparison requested but sox is not installed")
+                return failures + 1
+            samples = _test_signal(3.0, OUT_RATE, 1)
+            write_wav(wav, samples, OUT_RATE)
+            sox_ul = os.path.join(tmp, "sox.ul")
+            _sox(wav, sox_ul)
+            transcode(wav, ul)
+            with open(ul, "rb") as a, open(sox_ul, "rb") as b:
+                ok = a.read() == b.read()
+            print(f"{'ok  ' if ok else 'FAIL'} bit-exact with sox -D for 8 kHz mono input")
+            failures += not ok
+
+            for rate, channels in ((16000, 1), (22050, 1), (44100, 2), (48000, 2)):
+                write_wav(wav, _test_signal(3.0, rate, channels), rate, channels)
+                _sox(wav, sox_ul)
+                transcode(wav, ul)
+                ours, theirs = (ulaw_decode(open(p, "rb").read()) for p in (ul, sox_ul))
+                n = min(len(ours), len(theirs))
+                # Different (equally valid) filters: compare as signals, not bytes
+                noise = np.sum((ours[:n] - theirs[:n]) ** 2) or 1e-12
+                snr = 10 * math.log10(np.sum(theirs[:n] ** 2) / noise)
+                ok = abs(len(ours) - len(theirs)) <= 2 and snr > 30
+                print(f"{'ok  ' if ok else 'FAIL'} {rate} Hz x{channels} vs sox: "
+                      f"{len(ours)}/{len(theirs)} samples, SNR {snr:.1f} dB")
+                failures += not ok
+    return failures
+
+
+def ulaw_decode(data: bytes) -> np.ndarray:
+    """u-law bytes to float samples (G.711 expansion), for comparisons."""
+    u = ~np.frombuffer(data, dtype=np.uint8).astype(np.int32) & 0xFF
+    magnitude = (((u & 0x0F) << 3) + 0x84) << ((u & 0x70) >> 4)
+    return np.where(u & 0x80, 0x84 - magnitude, magnitude - 0x84) / 32768.0
+
+
+def bench(seconds: float, rate: int, channels: int, use_sox: bool = False):
+    with tempfile.TemporaryDirectory() as tmp:
+        wav, ul = os.path.join(tmp, "bench.wav"), os.path.join(tmp, "bench.ul")
+        write_wav(wav, _test_signal(seconds, rate, channels), rate, channels)
+        runs = []
+        for _ in range(3):
+            started = time.perf_counter()
+            transcode(wav, ul)
+            runs.append(time.perf_counter() - started)
+        best = min(runs)
+        print(f"in-process: {seconds:.0f}s of {rate} Hz x{channels} in {best * 1000:.1f} ms "
+              f"({seconds / best:.0f}x realtime)")
+        started = time.perf_counter()
+        subprocess.run([sys.executable, os.path.abspath(__file__), "convert", wav, ul], check=True)
+        print(f"python3 process per file (start + convert): {(time.perf_counter() - started) * 1000:.1f} ms")
+        if use_sox and shutil.which("sox"):
+            runs = []
+            for _ in range(3):
+                started = time.perf_counter()
+                _sox(wav, ul)
+                runs.append(time.perf_counter() - started)
+            print(f"sox process per file: {min(runs) * 1000:.1f} ms")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Transcode announcement audio to 8 kHz u-law.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_convert = sub.add_parser("convert")
+    p_convert.add_argument("input")
+    p_convert.add_argument("output")
+    p_convert.add_argument("--raw-rate", type=int, help="Input is headerless s16le PCM at this rate")
+    p_convert.add_argument("--raw-channels", type=int, default=1)
+    p_batch = sub.add_parser("batch")
+    p_batch.add_argument("directory")
+    p_batch.add_argument("--jobs", type=int)
+    p_batch.add_argument("--force", action="store_true")
+    p_batch.add_argument("--remove-source", action="store_true")
+    p_verify = sub.add_parser("verify")
+    p_verify.add_argument("--sox", action="store_true", help="Also compare against sox output")
+    p_bench = sub.add_parser("bench")
+    p_bench.add_argument("--seconds", type=float, default=60.0)
+    p_bench.add_argument("--rate", type=int, default=44100)
+    p_bench.add_argument("--channels", type=int, default=2)
+    p_bench.add_argument("--sox", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        try:
+            samples = transcode(args.input, args.output, args.raw_rate, args.raw_channels)
+        except UnsupportedFormat as e:
+            print(f"Unsupported input: {e}", file=sys.stderr)
+            return EXIT_UNSUPPORTED
+        except (OSError, ValueError) as e:
+            print(f"Transcode failed: {e}", file=sys.stderr)
+            return 1
+        print(f"Wrote {samples} samples ({samples / OUT_RATE:.1f}s) to {args.output}")
+        return 0
+    if args.command == "batch":
+        return 1 if batch(args.directory, args.jobs, args.force, args.remove_source) else 0
+    if args.command == "verify":
+        return 1 if verify(args.sox) else 0
+    bench(args.seconds, args.rate, args.channels, args.sox)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
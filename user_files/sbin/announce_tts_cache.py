@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""Render cache for TTS announcements.
+
+Finished ulaw renders are stored under a key derived from the normalized text,
+the voice and the output format, so repeating a phrase never runs Piper again.
+Each library name rendered through TTS is also remembered (text + voice), which
+lets scheduled announcements be restored or re-rendered ahead of their fire
+time instead of when cron plays them.
+
+Configured from [tts] in user_files/announcements.ini:
+  render_cache_dir          cache location (default /var/cache/supermon-ng/tts)
+  render_cache_max_mb       size budget, least recently used renders go first (0 = unlimited)
+  render_cache_max_age_days renders unused for longer are removed (0 = keep)
+
+Usage:
+  announce_tts_cache.py key --text-file PATH --voice VOICE
+  announce_tts_cache.py get --text-file PATH --voice VOICE --out PATH [--name NAME]
+  announce_tts_cache.py put --text-file PATH --voice VOICE --input PATH [--name NAME]
+  announce_tts_cache.py prerender [--mp3-dir DIR] [--sounds-dir DIR] [--name NAME --node NODE]
+  announce_tts_cache.py evict
+"""
+
+from __future__ import annotations
+
+import argparse
+import configparser
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unicodedata
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+APP_ROOT = SCRIPT_DIR.parent.parent
+DEFAULT_CONFIG = SCRIPT_DIR.parent / "announcements.ini"
+DEFAULT_CACHE_DIR = "/var/cache/supermon-ng/tts"
+DEFAULT_MAX_MB = 64
+DEFAULT_MAX_AGE_DAYS = 90
+OUTPUT_FORMAT = "ulaw-8000-mono"
+
+NAME_RE = re.compile(r"^[a-zA-Z0-9._-]+$")
+
+
+def load_config(path: Path) -> configparser.ConfigParser:
+    ini = configparser.ConfigParser(inline_comment_prefixes=(";", "#"))
+    if path.is_file():
+        ini.read(path, encoding="utf-8")
+    return ini
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and Unicode forms so cosmetic edits still hit the cache."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def normalize_voice(voice: str) -> str:
+    voice = (voice or "").strip()
+    return voice[:-5] if voice.endswith(".onnx") else voice
+
+
+def render_key(text: str, voice: str, fmt: str = OUTPUT_FORMAT) -> str:
+    payload = "\0".join((fmt, normalize_voice(voice), normalize_text(text)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Key -> ulaw file store with an index of library names rendered through TTS.
+
+    Layout:
+      <dir>/<key[:2]>/<key>.ul   render (mtime = last use)
+      <dir>/names.json           name -> {key, text, voice, fmt}
+    """
+
+    def __init__(self, root: Path, max_bytes: int, max_age: float):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.names_path = root / "names.json"
+        self._lock_fd = None
+
+    def __enter__(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock_fd = open(self.root / ".lock", "a+")
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            self._lock_fd.close()
+            self._lock_fd = None
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.ul"
+
+    def load_names(self) -> dict[str, dict]:
+        try:
+            data = json.loads(self.names_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save_names(self, names: dict[str, dict]) -> None:
+        tmp = self.names_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(names, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp, self.names_path)
+
+    def remember(self, name: str, key: str, text: str, voice: str) -> None:
+        names = self.load_names()
+        names[name] = {"key": key, "text": normalize_text(text), "voice": normalize_voice(voice), "fmt": OUTPUT_FORMAT}
+        self.save_names(names)
+
+    def get(self, key: str, out: Path) -> bool:
+        src = self.path_for(key)
+        if not src.is_file():
+            return False
+        _copy_atomic(src, out)
+        os.utime(src)
+        return True
+
+    def put(self, key: str, src: Path) -> None:
+        dest = self.path_for(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        _copy_atomic(src, dest)
+
+    def entries(self) -> list[tuple[float, int, Path]]:
+        out = []
+        for path in self.root.glob("??/*.ul"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+        return sorted(out)
+
+    def evict(self) -> int:
+        """Drop renders past max_age, then least recently used ones over max_bytes."""
+        removed = 0
+        now = time.time()
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            expired = self.max_age > 0 and now - mtime > self.max_age
+            over = self.max_bytes > 0 and total > self.max_bytes
+            if not expired and not over:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def _copy_atomic(src: Path, dest: Path) -> None:
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def open_cache(ini: configparser.ConfigParser) -> RenderCache:
+    root = Path(ini.get("tts", "render_cache_dir", fallback=DEFAULT_CACHE_DIR).strip() or DEFAULT_CACHE_DIR)
+    try:
+        max_mb = float(ini.get("tts", "render_cache_max_mb", fallback=str(DEFAULT_MAX_MB)))
+    except ValueError:
+        max_mb = DEFAULT_MAX_MB
+    try:
+        max_days = float(ini.get("tts", "render_cache_max_age_days", fallback=str(DEFAULT_MAX_AGE_DAYS)))
+    except ValueError:
+        max_days = DEFAULT_MAX_AGE_DAYS
+    return RenderCache(root, int(max_mb * 1024 * 1024), max_days * 86400)
+
+
+def _config_path(ini: configparser.ConfigParser, key: str, default: str) -> Path:
+    """[paths] value resolved like AnnouncementsService (relative to the app root)."""
+    path = Path(ini.get("paths", key, fallback=default).strip() or default)
+    return path if path.is_absolute() else APP_ROOT / path
+
+
+def scheduled_names() -> dict[str, str]:
+    """Library name -> node for every enabled cron schedule."""
+    try:
+        out = subprocess.run([str(SCRIPT_DIR / "announce-schedule.sh"), "list"],
+                             capture_output=True, text=True, check=True).stdout
+        entries = json.loads(out or "[]")
+    except (OSError, subprocess.CalledProcessError, json.JSONDecodeError):
+        return {}
+    return {
+        str(e["file"]): str(e.get("node") or "")
+        for e in entries
+        if isinstance(e, dict) and e.get("enabled") and e.get("file")
+    }
+
+
+def prerender(cache: RenderCache, names: dict[str, str], mp3_dir: Path, sounds_dir: Path,
+              tts_cmd: str) -> int:
+    """Make sure each name is installed in sounds_dir before it is played.
+
+    Order of preference: already installed, library copy, cached render, and
+    only then a fresh synthesis from the remembered text and voice.
+    """
+    failures = 0
+    remembered = cache.load_names()
+    for name, node in sorted(names.items()):
+        if not NAME_RE.match(name):
+            continue
+        dest = sounds_dir / f"{name}.ul"
+        if dest.is_file():
+            entry = remembered.get(name)
+            if entry and cache.path_for(entry["key"]).is_file():
+                os.utime(cache.path_for(entry["key"]))
+            continue
+        sounds_dir.mkdir(parents=True, exist_ok=True)
+        library = mp3_dir / f"{name}.ul"
+        if library.is_file():
+            _copy_atomic(library, dest)
+            print(f"Restored {name}.ul from library")
+            continue
+        entry = remembered.get(name)
+        if not entry:
+            print(f"No library copy or TTS source for {name}", file=sys.stderr)
+            failures += 1
+            continue
+        if cache.get(entry["key"], dest):
+            print(f"Restored {name}.ul from render cache")
+            continue
+        if not node:
+            print(f"Render for {name} was evicted; pass --node to re-synthesize", file=sys.stderr)
+            failures += 1
+            continue
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp) / name
+            argv = [tts_cmd, "-n", node, "-t", entry["text"], "-f", str(base)]
+            if entry.get("voice"):
+                argv[5:5] = ["-v", entry["voice"]]
+            result = subprocess.run(argv, capture_output=True, text=True, check=False)
+            rendered = base.with_suffix(".ul")
+            if result.returncode != 0 or not rendered.is_file():
+                print(f"Pre-render failed for {name}: {(result.stderr or '').strip()[:200]}", file=sys.stderr)
+                failures += 1
+                continue
+            cache.put(entry["key"], rendered)
+            mp3_dir.mkdir(parents=True, exist_ok=True)
+            _copy_atomic(rendered, library)
+            _copy_atomic(rendered, dest)
+            print(f"Pre-rendered {name}.ul")
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="TTS render cache for announcements.")
+    parser.add_argument("--config", type=Path, default=DEFAULT_CONFIG)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for cmd in ("key", "get", "put"):
+        p = sub.add_parser(cmd)
+        p.add_argument("--text-file", type=Path, required=True)
+        p.add_argument("--voice", default="")
+        p.add_argument("--name")
+        if cmd == "get":
+            p.add_argument("--out", type=Path, required=True)
+        if cmd == "put":
+            p.add_argument("--input", type=Path, required=True)
+
+    p_pre = sub.add_parser("prerender", help="Install scheduled announcements ahead of their fire time")
+    p_pre.add_argument("--mp3-dir", type=Path, help="Default: [paths] mp3_dir")
+    p_pre.add_argument("--sounds-dir", type=Path, help="Default: [paths] sounds_dir")
+    p_pre.add_argument("--node", default="", help="Node used for re-synthesis when a render was evicted")
+    p_pre.add_argument("--name", action="append", help="Limit to these names (default: enabled schedules)")
+
+    sub.add_parser("evict")
+
+    args = parser.parse_args(argv)
+    ini = load_config(args.config)
+
+    if args.command in ("key", "get", "put"):
+        if args.name and not NAME_RE.match(args.name):
+            print("Invalid name", file=sys.stderr)
+            return 1
+        try:
+            text = args.text_file.read_text(encoding="utf-8")
+        except OSError as e:
+            print(f"Cannot read text file: {e}", file=sys.stderr)
+            return 1
+        key = render_key(text, args.voice)
+        if args.command == "key":
+            print(key)
+            return 0
+
+    with open_cache(ini) as cache:
+        if args.command == "get":
+            if not cache.get(key, args.out):
+                return 1
+            if args.name:
+                cache.remember(args.name, key, text, args.voice)
+            print("Render cache hit")
+            return 0
+
+        if args.command == "put":
+            if not args.input.is_file():
+                print("Input file not found", file=sys.stderr)
+                return 1
+            cache.put(key, args.input)
+            if args.name:
+                cache.remember(args.name, key, text, args.voice)
+            cache.evict()
+            return 0
+
+        if args.command == "prerender":
+            names = {n: args.node for n in args.name} if args.name else scheduled_names()
+            tts_cmd = ini.get("tts", "command", fallback="asl-tts").strip() or "asl-tts"
+            mp3_dir = args.mp3_dir or _config_path(ini, "mp3_dir", "user_files/mp3")
+            sounds_dir = args.sounds_dir or _config_path(ini, "sounds_dir", "/usr/local/share/asterisk/sounds/announcements")
+            failures = prerender(cache, names, mp3_dir, sounds_dir, tts_cmd)
+            cache.evict()
+            return 1 if failures else 0
+
+        removed = cache.evict()
+        print(f"Evicted {removed} render(s)")
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
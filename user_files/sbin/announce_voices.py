@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""Piper voice model manager for Supermon-ng announcements.
+
+Downloads the .onnx / .onnx.json pair for each voice listed in
+user_files/announcement_voices.json (huggingface_path), in parallel and with
+resumable range requests. Finished files are verified, stored once in a
+content-addressed store under VOICES_DIR/.store/objects/<sha256> and
+hard-linked into VOICES_DIR where asl-tts / Piper expects them.
+
+When [tts] voice_cache_max_mb in announcements.ini is non-zero, the least
+recently used voices are evicted until the store fits the budget. The default
+voice, [tts] pinned_voices, and (with pin_curated = 1) curated catalog voices
+are never evicted. Voices installed by hand (not in the store index) are left
+alone.
+
+Usage:
+  announce_voices.py install [--voices-dir DIR] [--huggingface-path PATH] VOICE_ID [VOICE_ID ...]
+  announce_voices.py prefetch [--voices-dir DIR] [--curated | --pinned]
+  announce_voices.py touch [--voices-dir DIR] VOICE_ID
+  announce_voices.py evict [--voices-dir DIR] [--max-mb N]
+  announce_voices.py list [--voices-dir DIR]
+
+--base-url points downloads at another mirror (or a local HTTP stand-in).
+"""
+
+from __future__ import annotations
+
+import argparse
+import configparser
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+USER_FILES = SCRIPT_DIR.parent
+DEFAULT_CONFIG = USER_FILES / "announcements.ini"
+DEFAULT_CATALOG = USER_FILES / "announcement_voices.json"
+DEFAULT_VOICES_DIR = "/var/lib/piper-tts"
+BASE_URL = "https://huggingface.co/rhasspy/piper-voices/resolve/main"
+
+VOICE_ID_RE = re.compile(r"^[a-zA-Z0-9._-]+$")
+HF_PATH_RE = re.compile(r"^[a-zA-Z0-9._/-]+$")
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+STORE_DIR = ".store"
+CHUNK_SIZE = 256 * 1024
+DOWNLOAD_ATTEMPTS = 3
+DEFAULT_JOBS = 4
+
+
+class VoiceError(Exception):
+    """Download, verification or store failure for a voice model."""
+
+
+@dataclass
+class FileTask:
+    voice_id: str
+    name: str
+    url: str
+    size_bytes: int | None = None
+    md5_digest: str | None = None
+
+
+def _config_flag_yes(value) -> bool:
+    return str(value or "").strip().lower() in ("yes", "1", "true", "on")
+
+
+def load_config(path: Path) -> configparser.ConfigParser:
+    ini = configparser.ConfigParser(inline_comment_prefixes=(";", "#"))
+    if path.is_file():
+        ini.read(path, encoding="utf-8")
+    return ini
+
+
+def load_catalog(path: Path) -> dict[str, dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    voices = data.get("voices") if isinstance(data, dict) else None
+    return voices if isinstance(voices, dict) else {}
+
+
+def _strip_onnx(voice: str) -> str:
+    return voice[:-5] if voice.endswith(".onnx") else voice
+
+
+def pinned_voice_ids(ini: configparser.ConfigParser, catalog: dict[str, dict]) -> set[str]:
+    """Voices that eviction must never remove."""
+    pinned = set()
+    default_voice = _strip_onnx(ini.get("tts", "voice", fallback="").strip())
+    if default_voice:
+        pinned.add(default_voice)
+    for voice in ini.get("tts", "pinned_voices", fallback="").split(","):
+        voice = _strip_onnx(voice.strip())
+        if voice:
+            pinned.add(voice)
+    if _config_flag_yes(ini.get("tts", "pin_curated", fallback="no")):
+        pinned.update(vid for vid, meta in catalog.items() if isinstance(meta, dict) and meta.get("curated"))
+    return pinned
+
+
+class VoiceStore:
+    """Content-addressed store of voice files with an LRU index.
+
+    Layout under VOICES_DIR/.store:
+      objects/<sha256>          verified file contents (one copy per digest)
+      partial/<voice>/<name>    in-flight downloads, resumed on the next attempt
+      index.json                voice -> {files: {name: sha256}, size, last_used}
+
+    locked() guards index.json and objects/ and is only held for those short
+    updates, never across a download; each partial file has its own lock.
+    """
+
+    def __init__(self, voices_dir: Path):
+        self.voices_dir = voices_dir
+        self.root = voices_dir / STORE_DIR
+        self.objects = self.root / "objects"
+        self.partial = self.root / "partial"
+        self.index_path = self.root / "index.json"
+
+    def __enter__(self):
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.partial.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+    @contextmanager
+    def locked(self, blocking: bool = True):
+        """Exclusive store lock; yields False instead of waiting when blocking is off and it is busy."""
+        with open(self.root / "lock", "a+") as fd:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def load_index(self) -> dict:
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        if not isinstance(data.get("voices"), dict):
+            data = {"voices": {}}
+        return data
+
+    def save_index(self, index: dict) -> None:
+        tmp = self.index_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(index, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def partial_path(self, voice_id: str, name: str) -> Path:
+        return self.partial / voice_id / (name + ".part")
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects / digest
+
+    def commit_object(self, part: Path, digest: str) -> Path:
+        """Move a verified download into the store (under locked()); duplicates are dropped."""
+        dest = self.object_path(digest)
+        if dest.exists():
+            part.unlink(missing_ok=True)
+            return dest
+        try:
+            os.chmod(part, 0o644)
+            os.replace(part, dest)
+        except FileNotFoundError:
+            # Another installer of the same voice committed (and cleaned up) first.
+            if not dest.exists():
+                raise VoiceError(f"Download of {part.name} disappeared before it was stored")
+        return dest
+
+    def link_into_voices_dir(self, digest: str, name: str) -> None:
+        """Atomically expose a stored object as VOICES_DIR/<name>."""
+        src = self.object_path(digest)
+        dest = self.voices_dir / name
+        tmp = self.voices_dir / f".{name}.tmp"
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, dest)
+
+    def disk_usage(self) -> int:
+        total = 0
+        for path in self.objects.iterdir():
+            try:
+                total += path.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def remove_voice(self, index: dict, voice_id: str) -> int:
+        """Unlink a managed voice; return bytes freed from the store."""
+        entry = index["voices"].pop(voice_id, None)
+        if not entry:
+            return 0
+        for name, digest in entry.get("files", {}).items():
+            path = self.voices_dir / name
+            try:
+                # Only remove the link we created; a file replaced by hand is left in place.
+                if path.stat().st_ino == self.object_path(digest).stat().st_ino:
+                    path.unlink()
+            except OSError:
+                pass
+        return self.collect_garbage(index)
+
+    def collect_garbage(self, index: dict) -> int:
+        referenced = {d for e in index["voices"].values() for d in e.get("files", {}).values()}
+        freed = 0
+        for path in self.objects.iterdir():
+            if path.name in referenced:
+                continue
+            try:
+                freed += path.stat().st_size
+                path.unlink()
+            except OSError:
+                continue
+        return freed
+
+
+def _expected_sha256(response: requests.Response) -> str | None:
+    """Hugging Face reports the LFS sha256 as X-Linked-Etag on the resolve redirect."""
+    for resp in [*response.history, response]:
+        for header in ("X-Linked-Etag", "ETag"):
+            value = resp.headers.get(header, "").strip().strip('"')
+            if value.startswith("W/"):
+                continue
+            if SHA256_RE.match(value):
+                return value
+    return None
+
+
+def _hash_existing(path: Path, sha: "hashlib._Hash", md5: "hashlib._Hash") -> int:
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha.update(chunk)
+            md5.update(chunk)
+            size += len(chunk)
+    return size
+
+
+def download_file(session: requests.Session, store: VoiceStore, task: FileTask, timeout: float) -> str:
+    """Fetch one file with resume support; return its verified sha256.
+
+    The verified file stays at store.partial_path() until install_voices()
+    commits it under the store lock. Concurrent installers of the same file
+    serialize on a per-file lock rather than the store lock.
+    """
+    part = store.partial_path(task.voice_id, task.name)
+    part.parent.mkdir(parents=True, exist_ok=True)
+    with open(part.with_name(part.name + ".lock"), "a+") as lock_fd:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        return _download_locked(session, part, task, timeout)
+
+
+def _download_locked(session: requests.Session, part: Path, task: FileTask, timeout: float) -> str:
+    last_error = None
+
+    for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+        sha = hashlib.sha256()
+        md5 = hashlib.md5()
+        offset = _hash_existing(part, sha, md5) if part.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with session.get(task.url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416 and offset:
+                    # Partial already holds the whole file (or is bogus); verify below or restart.
+                    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                    if not total.isdigit() or int(total) != offset:
+                        part.unlink(missing_ok=True)
+                        last_error = f"stale partial for {task.name}"
+                        continue
+                    expected = _expected_sha256(response)
+                elif response.status_code == 206 and offset:
+                    content_range = response.headers.get("Content-Range", "")
+                    if not content_range.startswith(f"bytes {offset}-"):
+                        part.unlink(missing_ok=True)
+                        last_error = f"unexpected Content-Range {content_range!r} for {task.name}"
+                        continue
+                    expected = _expected_sha256(response)
+                    mode = "ab"
+                elif response.status_code == 200:
+                    if offset:
+                        sha, md5, offset = hashlib.sha256(), hashlib.md5(), 0
+                    expected = _expected_sha256(response)
+                    mode = "wb"
+                else:
+                    last_error = f"HTTP {response.status_code} for {task.url}"
+                    if response.status_code == 404:
+                        break
+                    continue
+
+                if response.status_code != 416:
+                    with open(part, mode) as f:
+                        for chunk in response.iter_content(CHUNK_SIZE):
+                            if chunk:
+                                f.write(chunk)
+                                sha.update(chunk)
+                                md5.update(chunk)
+        except requests.RequestException as e:
+            last_error = f"{task.name}: {e}"
+            continue
+
+        digest = sha.hexdigest()
+        size = part.stat().st_size
+        problems = []
+        if task.size_bytes is not None and size != task.size_bytes:
+            problems.append(f"size {size} != {task.size_bytes}")
+        if task.md5_digest and md5.hexdigest() != task.md5_digest.lower():
+            problems.append("md5 mismatch")
+        if expected and digest != expected:
+            problems.append("sha256 mismatch")
+        if problems:
+            part.unlink(missing_ok=True)
+            last_error = f"{task.name}: checksum verification failed ({', '.join(problems)})"
+            continue
+
+        return digest
+
+    raise VoiceError(last_error or f"Failed to download {task.name}")
+
+
+def build_tasks(voice_id: str, hf_path: str, base_url: str, meta: dict | None) -> list[FileTask]:
+    files = meta.get("files") if isinstance(meta, dict) else None
+    files = files if isinstance(files, dict) else {}
+    tasks = []
+    for name in (f"{voice_id}.onnx", f"{voice_id}.onnx.json"):
+        info = files.get(name) if isinstance(files.get(name), dict) else {}
+        size = info.get("size_bytes")
+        tasks.append(FileTask(
+            voice_id=voice_id,
+            name=name,
+            url=f"{base_url.rstrip('/')}/{hf_path}/{name}",
+            size_bytes=int(size) if isinstance(size, int) else None,
+            md5_digest=str(info["md5_digest"]) if info.get("md5_digest") else None,
+        ))
+    return tasks
+
+
+def make_session(jobs: int) -> requests.Session:
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=jobs, pool_maxsize=jobs)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "Supermon-NG/1.0 (announcement voice manager)"
+    return session
+
+
+def install_voices(store: VoiceStore, requested: dict[str, str], catalog: dict[str, dict],
+                   base_url: str, jobs: int, timeout: float) -> tuple[list[str], dict[str, str]]:
+    """Download and link voices; return (installed ids, {voice id: error})."""
+    now = time.time()
+    installed, errors = [], {}
+    tasks = []
+    with store.locked():
+        index = store.load_index()
+        for voice_id, hf_path in requested.items():
+            entry = index["voices"].get(voice_id)
+            if entry and all((store.voices_dir / n).is_file() for n in entry.get("files", {})):
+                entry["last_used"] = now
+                installed.append(voice_id)
+                print(f"Voice already installed: {voice_id}")
+                continue
+            tasks.extend(build_tasks(voice_id, hf_path, base_url, catalog.get(voice_id)))
+        if installed:
+            store.save_index(index)
+
+    digests: dict[str, dict[str, str]] = {}
+    if tasks:
+        with make_session(jobs) as session, ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(download_file, session, store, t, timeout): t for t in tasks}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    digests.setdefault(task.voice_id, {})[task.name] = future.result()
+                except VoiceError as e:
+                    errors.setdefault(task.voice_id, str(e))
+
+    complete = {vid: files for vid, files in digests.items() if vid not in errors and len(files) == 2}
+    if not complete:
+        return installed, errors
+
+    # Index may have changed while downloading; reload it under the lock.
+    with store.locked():
+        index = store.load_index()
+        for voice_id, files in complete.items():
+            try:
+                for name, digest in files.items():
+                    store.commit_object(store.partial_path(voice_id, name), digest)
+                for name, digest in files.items():
+                    store.link_into_voices_dir(digest, name)
+            except (OSError, VoiceError) as e:
+                errors[voice_id] = str(e)
+                continue
+            shutil.rmtree(store.partial / voice_id, ignore_errors=True)
+            index["voices"][voice_id] = {
+                "files": files,
+                "size": sum(store.object_path(d).stat().st_size for d in set(files.values())),
+                "installed": now,
+                "last_used": now,
+            }
+            installed.append(voice_id)
+            print(f"Installed voice {voice_id}")
+        store.collect_garbage(index)
+        store.save_index(index)
+    return installed, errors
+
+
+def evict(store: VoiceStore, max_bytes: int, pinned: set[str], keep: set[str] = frozenset()) -> list[str]:
+    """Remove least recently used, unpinned voices until the store fits max_bytes."""
+    if max_bytes <= 0:
+        return []
+    with store.locked():
+        return _evict_locked(store, max_bytes, pinned, keep)
+
+
+def _evict_locked(store: VoiceStore, max_bytes: int, pinned: set[str], keep: set[str]) -> list[str]:
+    index = store.load_index()
+    store.collect_garbage(index)
+    usage = store.disk_usage()
+    evicted = []
+    candidates = sorted(
+        (vid for vid in index["voices"] if vid not in pinned and vid not in keep),
+        key=lambda vid: float(index["voices"][vid].get("last_used", 0)),
+    )
+    for voice_id in candidates:
+        if usage <= max_bytes:
+            break
+        usage -= store.remove_voice(index, voice_id)
+        evicted.append(voice_id)
+        print(f"Evicted voice {voice_id} (least recently used)")
+    if usage > max_bytes:
+        print(f"Voice store is {usage // (1024 * 1024)} MB; pinned voices exceed the {max_bytes // (1024 * 1024)} MB budget")
+    store.save_index(index)
+    return evicted
+
+
+def touch(store: VoiceStore, voice_id: str) -> bool:
+    """Best-effort LRU update: skipped (not waited for) while the store is busy."""
+    with store.locked(blocking=False) as acquired:
+        if not acquired:
+            return True
+        index = store.load_index()
+        entry = index["voices"].get(voice_id)
+        if not entry:
+            return False
+        entry["last_used"] = time.time()
+        store.save_index(index)
+        return True
+
+
+def _budget_bytes(args, ini: configparser.ConfigParser) -> int:
+    if args.max_mb is not None:
+        return int(args.max_mb * 1024 * 1024)
+    try:
+        return int(float(ini.get("tts", "voice_cache_max_mb", fallback="0")) * 1024 * 1024)
+    except ValueError:
+        return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    # Shared options are accepted before or after the subcommand; SUPPRESS keeps a
+    # subcommand's parse from overwriting a value given before it.
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--voices-dir", default=argparse.SUPPRESS, help="Piper voices directory (default: [tts] voices_dir)")
+    common.add_argument("--config", type=Path, default=argparse.SUPPRESS)
+    common.add_argument("--catalog", type=Path, default=argparse.SUPPRESS)
+    common.add_argument("--base-url", default=argparse.SUPPRESS)
+    common.add_argument("--jobs", type=int, default=argparse.SUPPRESS)
+    common.add_argument("--timeout", type=float, default=argparse.SUPPRESS)
+    common.add_argument("--max-mb", type=float, default=argparse.SUPPRESS, help="Disk budget (default: [tts] voice_cache_max_mb)")
+
+    defaults = {
+        "voices_dir": None,
+        "config": DEFAULT_CONFIG,
+        "catalog": DEFAULT_CATALOG,
+        "base_url": os.environ.get("PIPER_VOICES_BASE_URL", BASE_URL),
+        "jobs": DEFAULT_JOBS,
+        "timeout": 60.0,
+        "max_mb": None,
+    }
+
+    parser = argparse.ArgumentParser(description="Manage Piper voice models for announcements.", parents=[common])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_install = sub.add_parser("install", help="Download and install voices", parents=[common])
+    p_install.add_argument("--huggingface-path", help="Path under the base URL (single voice only)")
+    p_install.add_argument("voice_ids", nargs="+")
+
+    p_prefetch = sub.add_parser("prefetch", help="Install every curated or pinned voice", parents=[common])
+    group = p_prefetch.add_mutually_exclusive_group()
+    group.add_argument("--curated", action="store_true")
+    group.add_argument("--pinned", action="store_true")
+
+    p_touch = sub.add_parser("touch", help="Mark a voice as recently used", parents=[common])
+    p_touch.add_argument("voice_id")
+
+    sub.add_parser("evict", help="Apply the disk budget now", parents=[common])
+    sub.add_parser("list", help="Show managed voices", parents=[common])
+
+    args = parser.parse_args(argv)
+    for key, value in defaults.items():
+        if not hasattr(args, key):
+            setattr(args, key, value)
+    ini = load_config(args.config)
+    catalog = load_catalog(args.catalog)
+    voices_dir = Path(args.voices_dir or ini.get("tts", "voices_dir", fallback=DEFAULT_VOICES_DIR))
+    pinned = pinned_voice_ids(ini, catalog)
+    jobs = max(1, args.jobs)
+
+    if args.command in ("touch", "list", "evict") and not voices_dir.is_dir():
+        print(f"Voices directory not found: {voices_dir}", file=sys.stderr)
+        return 1
+    voices_dir.mkdir(parents=True, exist_ok=True)
+
+    with VoiceStore(voices_dir) as store:
+        if args.command == "touch":
+            return 0 if touch(store, _strip_onnx(args.voice_id)) else 1
+
+        if args.command == "list":
+            index = store.load_index()
+            for voice_id, entry in sorted(index["voices"].items()):
+                mark = " (pinned)" if voice_id in pinned else ""
+                used = time.strftime("%Y-%m-%d %H:%M", time.localtime(float(entry.get("last_used", 0))))
+                print(f"{voice_id}\t{int(entry.get('size', 0)) // 1024} KB\tlast used {used}{mark}")
+            print(f"Store: {store.disk_usage() // (1024 * 1024)} MB, budget: {_budget_bytes(args, ini) // (1024 * 1024) or 'unlimited'} MB")
+            return 0
+
+        if args.command == "evict":
+            evict(store, _budget_bytes(args, ini), pinned)
+            return 0
+
+        if args.command == "install":
+            ids = [_strip_onnx(v) for v in args.voice_ids]
+            if args.huggingface_path and len(ids) != 1:
+                print("--huggingface-path applies to a single voice", file=sys.stderr)
+                return 1
+        elif args.curated:
+            ids = sorted(vid for vid, meta in catalog.items() if isinstance(meta, dict) and meta.get("curated"))
+        else:
+            ids = sorted(pinned)
+
+        requested = {}
+        for voice_id in ids:
+            if not VOICE_ID_RE.match(voice_id):
+                print(f"Invalid voice id: {voice_id}", file=sys.stderr)
+                return 1
+            meta = catalog.get(voice_id) if isinstance(catalog.get(voice_id), dict) else {}
+            hf_path = getattr(args, "huggingface_path", None) or str(meta.get("huggingface_path", ""))
+            if not hf_path or not HF_PATH_RE.match(hf_path):
+                print(f"Voice is not available in the catalog: {voice_id}", file=sys.stderr)
+                return 1
+            requested[voice_id] = hf_path
+
+        installed, errors = install_voices(store, requested, catalog, args.base_url, jobs, args.timeout)
+        evict(store, _budget_bytes(args, ini), pinned, keep=set(installed))
+        for voice_id, error in sorted(errors.items()):
+            print(f"Failed to install {voice_id}: {error}", file=sys.stderr)
+        return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,12 +5,69 @@ import subprocess
 import re
 import time
 import configparser
+import hashlib
+import heapq
 import requests
 import json
 
+import node_metric_history
+import node_weather
+import offline_geocoder
+
 # Asterisk/app_rpt does not persist ALERT when it exceeds ~500 chars. Cap as large as practical.
 ALERT_MAX_LEN = 500
 
+# Nodes per /api/status request and concurrent requests ([general] ALERT_CHUNK_SIZE / ALERT_MAX_WORKERS)
+ALERT_CHUNK_SIZE = 10
+ALERT_MAX_WORKERS = 4
+
+# Write scheduling: each cycle gets CYCLE_BUDGET_SECONDS ([general] CYCLE_BUDGET_SECONDS).
+# Changed Extreme/Severe ALERTs are written first, then other changed ALERTs,
+# then cosmetic stats (and unchanged ALERT refreshes). Writes still pending at
+# the deadline are deferred and win ties in the next cycle.
+CYCLE_BUDGET_SECONDS = 60
+WRITE_PRIORITY_SEVERE_ALERT = 0
+WRITE_PRIORITY_ALERT = 1
+WRITE_PRIORITY_STATS = 2
+SEVERITY_RANK = {"Extreme": 4, "Severe": 3, "Moderate": 2, "Minor": 1}
+
+# rpt variable encoding ([general] STATUS_FORMAT). "html" writes inline-styled
+# markup; "compact" writes short tokens that the dashboard renders with CSS
+# classes (frontend/src/utils/rptStatus.ts):
+#   cpu_temp  ~T|<band 0-2>|<value>|<unit>
+#   WX        ~W|<label>|<report>
+#   ALERT     ~A|<provider S/C>|<state> or ~A|<provider>|<rank><event>|...
+# State is N (no alerts), D (disabled), X (API error), T (timeout) or O
+# (offline); rank is the SEVERITY_RANK of each alert (0 = unknown).
+STATUS_FORMAT = "html"
+TEMP_BAND_COLORS = ("lightgreen", "yellow", "#fa4c2d")
+ALERT_STATE_HTML = {
+    "N": "<span style='color: #FF0000;'>No Alerts</span>",
+    "X": "<span style='color: #FF0000;'>API Error</span>",
+    "T": "<span style='color: #FF6600;'>API Timeout</span>",
+    "O": "<span style='color: #FF6600;'>API Offline</span>",
+}
+ALERT_SEVERITY_COLORS = {"Extreme": "#FF0000", "Severe": "#FF6600", "Moderate": "#FFCC00", "Minor": "#FFFF00"}
+
+DEBUG_LOG = "/tmp/node_status_debug.log"
+SKYWARN_ERROR_LOG = "/tmp/skywarn_api_errors.log"
+
+# Low-write mode ([general] LOW_WRITE = yes) for SD-card nodes: caches and metric
+# history live on tmpfs (history is flushed to disk every
+# METRIC_HISTORY_FLUSH_MINUTES), ALERT is set without temp files, and log lines
+# are buffered in memory and written once per run with size-based rotation.
+LOW_WRITE = False
+LOW_WRITE_DIR = "/run/supermon-ng"
+LOG_MAX_BYTES = 256 * 1024
+_log_buffers = {}
+
+# GPS place names ([general] GEOCODER): "offline" resolves from the prebuilt
+# GeoNames index and falls back to Nominatim, "offline_only" never goes online,
+# "online" is the previous Nominatim-only behaviour.
+GEOCODER = "offline"
+GEOCODER_INDEX = offline_geocoder.DEFAULT_INDEX
+GEOCODER_MAX_KM = offline_geocoder.DEFAULT_MAX_KM
+
 def run_command(command):
     try:
         process = subprocess.run(command, shell=True, capture_output=True, text=True, check=True)
@@ -77,26 +134,41 @@ def get_cpu_temperature(temp_unit):
             return '"Temp Unit Invalid in config"'
 
         temp_int = int(temp_val)
+        if unit_str == "C":
+            band = 0 if temp_int <= 50 else 1 if temp_int <= 60 else 2
+        else:
+            band = 0 if temp_int <= 140 else 1 if temp_int <= 158 else 2
+
+        if STATUS_FORMAT == "compact":
+            return f'"~T|{band}|{temp_int}|{unit_str}"'
         temp_display = f"{temp_int} {unit_str}"
         temp_style = 'color: black; font-weight: bold;'
-
-        if unit_str == "C":
-            if temp_int <= 50:
-                return f'"<span style=\'background-color:lightgreen;\'><b><span style=\'{temp_style}\'>{temp_display}</span></b></span>"'
-            elif temp_int <= 60:
-                return f'"<span style=\'background-color:yellow;\'><b><span style=\'{temp_style}\'>{temp_display}</span></b></span>"'
-            else:
-                return f'"<span style=\'background-color:#fa4c2d;\'><b><span style=\'{temp_style}\'>{temp_display}</span></b></span>"'
-        elif unit_str == "F":
-            if temp_int <= 140:
-                return f'"<span style=\'background-color:lightgreen;\'><b><span style=\'{temp_style}\'>{temp_display}</span></b></span>"'
-            elif temp_int <= 158:
-                return f'"<span style=\'background-color:yellow;\'><b><span style=\'{temp_style}\'>{temp_display}</span></b></span>"'
-            else:
-                return f'"<span style=\'background-color:#fa4c2d;\'><b><span style=\'{temp_style}\'>{temp_display}</span></b></span>"'
+        return f'"<span style=\'background-color:{TEMP_BAND_COLORS[band]};\'><b><span style=\'{temp_style}\'>{temp_display}</span></b></span>"'
     else:
         return '"N/A"'
 
+def _read_load1():
+    """1-minute load average as a float (metric history)."""
+    try:
+        with open("/proc/loadavg", encoding="utf-8") as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _disk_used_percent(path="/"):
+    """Disk use percent computed like df (metric history)."""
+    try:
+        st = os.statvfs(path)
+    except OSError:
+        return None
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    avail = st.f_bavail * st.f_frsize
+    if used + avail <= 0:
+        return None
+    return round(used * 100 / (used + avail), 2)
+
+
 def _config_flag_yes(value):
     return str(value or "").strip().lower() in ("yes", "1", "true", "on")
 
@@ -204,8 +276,13 @@ def _format_nominatim_address(address):
     return country if country else None
 
 
+def _state_dir():
+    """Where Supermon keeps its own transient caches (tmpfs in low-write mode)."""
+    return LOW_WRITE_DIR if LOW_WRITE else _saytime_tmp_dir()
+
+
 def _load_gps_place_cache():
-    path = os.path.join(_saytime_tmp_dir(), "supermon-gps-place-cache.json")
+    path = os.path.join(_state_dir(), "supermon-gps-place-cache.json")
     try:
         with open(path, encoding="utf-8") as f:
             data = json.load(f)
@@ -215,7 +292,7 @@ def _load_gps_place_cache():
 
 
 def _save_gps_place_cache(cache):
-    path = os.path.join(_saytime_tmp_dir(), "supermon-gps-place-cache.json")
+    path = os.path.join(_state_dir(), "supermon-gps-place-cache.json")
     try:
         with open(path, "w", encoding="utf-8") as f:
             json.dump(cache, f)
@@ -223,8 +300,26 @@ def _save_gps_place_cache(cache):
         pass
 
 
+def _offline_place_name(lat, lon):
+    """Nearest 'City, State' from the local gazetteer index, or None."""
+    geocoder = offline_geocoder.load(GEOCODER_INDEX)
+    if geocoder is None:
+        return None
+    found = geocoder.nearest(lat, lon, max_km=GEOCODER_MAX_KM)
+    return found[0] if found else None
+
+
 def _reverse_geocode_place_name(lat, lon, max_age_seconds=30 * 24 * 3600):
-    """Resolve city/region from coordinates (gpsd has no place names). Uses Nominatim + cache."""
+    """Resolve city/region from coordinates (gpsd has no place names).
+
+    Tries the offline gazetteer first, then Nominatim + cache unless GEOCODER
+    is "offline_only".
+    """
+    if GEOCODER != "online":
+        name = _offline_place_name(lat, lon)
+        if name or GEOCODER == "offline_only":
+            return name
+
     key = f"{round(lat, 4)},{round(lon, 4)}"
     cache = _load_gps_place_cache()
     entry = cache.get(key)
@@ -275,16 +370,38 @@ def _gps_display_label(wx_location):
     return "GPS"
 
 
-def get_weather(wx_code, wx_location, use_gps=False):
+def _compact_field(value):
+    """Make free text safe inside a compact token (no field separators or quotes)."""
+    return " ".join(str(value).replace("|", "/").replace('"', "'").split())
+
+
+def _format_wx(label, wx_raw):
+    """WX variable value for a place label and weather text."""
+    if STATUS_FORMAT == "compact":
+        return f'"~W|{_compact_field(label)}|{_compact_field(wx_raw)}"'
+    return f'"<b>{label}   ({wx_raw})</b>"'
+
+
+def get_weather(wx_code, wx_location, use_gps=False, backend="native"):
     """Fetch weather text for the node WX variable.
 
-    When use_gps is True, calls saytime_weather_rb weather.rb --gps v (gpsd).
-    Otherwise uses wx_code (postal, ICAO, lat,lon, etc.) with legacy scripts as fallback.
+    With backend "native" (default) the in-process node_weather provider is
+    tried first; the saytime scripts remain the fallback. When use_gps is True,
+    the native lookup uses the last saytime GPS fix, then weather.rb --gps v
+    (gpsd). Otherwise uses wx_code (postal, ICAO, lat,lon, etc.).
     """
     wx_code = str(wx_code or "").strip()
     label = (wx_location or "").strip()
+    native = str(backend or "native").strip().lower() != "scripts"
 
     if use_gps:
+        if native:
+            lat, lon = _read_saytime_gps_fix()
+            if lat is not None and lon is not None:
+                wx_raw = node_weather.lookup(lat=lat, lon=lon)
+                if wx_raw:
+                    print("[NodeStatus] Weather: GPS (native)")
+                    return _format_wx(_gps_display_label(wx_location), wx_raw)
         weather_rb = "/usr/sbin/weather.rb"
         if os.access(weather_rb, os.X_OK):
             print("[NodeStatus] Weather: GPS (weather.rb --gps)")
@@ -293,7 +410,7 @@ def get_weather(wx_code, wx_location, use_gps=False):
             if label != "GPS":
                 print(f"[NodeStatus] GPS place label: {label}")
             if wx_raw:
-                return f'"<b>{label}   ({wx_raw})</b>"'
+                return _format_wx(label, wx_raw)
         else:
             print("[NodeStatus] GPS weather requested but /usr/sbin/weather.rb not found or not executable")
         return '" "'
@@ -305,6 +422,12 @@ def get_weather(wx_code, wx_location, use_gps=False):
         )
         return '" "'
 
+    if native:
+        wx_raw = node_weather.lookup(wx_code)
+        if wx_raw:
+            return _format_wx(label, wx_raw)
+        print("[NodeStatus] Native weather lookup failed; trying weather scripts")
+
     weather_scripts = [
         "/usr/sbin/weather.rb",
         "/usr/sbin/weather.pl",
@@ -315,7 +438,7 @@ def get_weather(wx_code, wx_location, use_gps=False):
         if os.access(weather_script, os.X_OK):
             wx_raw = run_weather_command([weather_script, wx_code, "v"])
             if wx_raw:
-                return f'"<b>{label}   ({wx_raw})</b>"'
+                return _format_wx(label, wx_raw)
 
     return '" "'
 
@@ -332,25 +455,112 @@ def get_disk_usage():
                 return f'"Disk - {used} {percent} used, {available} remains"'
     return '"Disk - N/A"'
 
+def _rotate_log(path, incoming=0):
+    """Move path to path.1 once it would grow past LOG_MAX_BYTES."""
+    try:
+        if os.path.getsize(path) + incoming > LOG_MAX_BYTES:
+            os.replace(path, path + ".1")
+    except OSError:
+        pass
+
+
+def _append_log(path, text):
+    """Append text to a log file; buffered until _flush_logs() in low-write mode."""
+    if LOW_WRITE:
+        _log_buffers.setdefault(path, []).append(text)
+        return
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+    except Exception:
+        pass
+
+
+def _flush_logs():
+    """Write buffered log lines with one append per file, rotating first."""
+    for path, chunks in list(_log_buffers.items()):
+        text = "".join(chunks)
+        _rotate_log(path, len(text))
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(text)
+        except Exception:
+            pass
+    _log_buffers.clear()
+
+
+def _rotate_stdout_log():
+    """copytruncate the systemd StandardOutput=append: log once it exceeds LOG_MAX_BYTES."""
+    try:
+        st = os.fstat(1)
+        import stat
+        if not stat.S_ISREG(st.st_mode) or st.st_size <= LOG_MAX_BYTES:
+            return
+        path = os.readlink("/proc/self/fd/1")
+        import shutil
+        shutil.copyfile(path, path + ".1")
+        os.ftruncate(1, 0)
+    except OSError:
+        pass
+
+
+def _touch(path):
+    try:
+        with open(path, "a"):
+            pass
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def _proc_io():
+    """Read /proc/self/io counters (bytes this process wrote/read)."""
+    counters = {}
+    try:
+        with open("/proc/self/io", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if value.strip().isdigit():
+                    counters[key.strip()] = int(value)
+    except OSError:
+        pass
+    return counters
+
+
+def _io_summary(io_start):
+    """Bytes this run wrote, from /proc/self/io (storage writes and write() calls)."""
+    io_end = _proc_io()
+    if not io_end:
+        return "I/O: /proc/self/io unavailable"
+    wrote = io_end.get("write_bytes", 0) - io_start.get("write_bytes", 0)
+    wchar = io_end.get("wchar", 0) - io_start.get("wchar", 0)
+    return f"I/O: write_bytes={wrote} wchar={wchar}"
+
+
+def _finish_run(io_start, code=0):
+    _flush_logs()
+    print(f"[NodeStatus] {_io_summary(io_start)}")
+    exit(code)
+
+
 def _debug_log(msg: str) -> None:
     """Append to /tmp/node_status_debug.log for debugging API → ALERT flow."""
     if os.environ.get("SUPERMON_NODE_STATUS_DEBUG", "").lower() not in ("1", "true", "yes", "on"):
         return
     from datetime import datetime
-    try:
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open("/tmp/node_status_debug.log", "a", encoding="utf-8") as f:
-            f.write(f"[{ts}] {msg}\n")
-    except Exception:
-        pass
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _append_log(DEBUG_LOG, f"[{ts}] {msg}\n")
 
 
 def _debug_log_clear() -> None:
     """Truncate debug log at start of run so we only see latest."""
     if os.environ.get("SUPERMON_NODE_STATUS_DEBUG", "").lower() not in ("1", "true", "yes", "on"):
         return
+    if LOW_WRITE:
+        _log_buffers.pop(DEBUG_LOG, None)
+        return
     try:
-        with open("/tmp/node_status_debug.log", "w", encoding="utf-8") as f:
+        with open(DEBUG_LOG, "w", encoding="utf-8") as f:
             f.write("")
     except Exception:
         pass
@@ -363,121 +573,65 @@ def _log_skywarn_api_error(msg, status_code=None, body_snippet=None):
     if status_code is not None:
         line += f" (HTTP {status_code})"
     print(line)
-    try:
-        with open("/tmp/skywarn_api_errors.log", "a", encoding="utf-8") as f:
-            f.write(line + "\n")
-            if body_snippet:
-                # Log first 500 chars inline; if longer, add truncated traceback/body
-                snippet = body_snippet[:500] if len(body_snippet) > 500 else body_snippet
-                f.write(f"  | {snippet}\n")
-                if len(body_snippet) > 500:
-                    f.write("  (truncated)\n")
-    except Exception:
-        pass
+    text = line + "\n"
+    if body_snippet:
+        # Log first 500 chars inline; if longer, add truncated traceback/body
+        snippet = body_snippet[:500] if len(body_snippet) > 500 else body_snippet
+        text += f"  | {snippet}\n"
+        if len(body_snippet) > 500:
+            text += "  (truncated)\n"
+    _append_log(SKYWARN_ERROR_LOG, text)
+
+
+def _alert_sep():
+    return "|" if STATUS_FORMAT == "compact" else "<br>"
+
+
+def _alert_state_text(state):
+    """Status line shown after the provider name (state code in compact mode)."""
+    return state if STATUS_FORMAT == "compact" else ALERT_STATE_HTML[state]
+
 
+def _alert_segment(event, severity):
+    if STATUS_FORMAT == "compact":
+        return f"{SEVERITY_RANK.get(severity, 0)}{_compact_field(event)}"
+    color = ALERT_SEVERITY_COLORS.get(severity, '#FF0000')
+    return f"<span style='color: {color};'><b>{event}</b></span>"
 
-def _format_alert_html(enabled_text, has_alerts, alerts, no_alerts_text="<span style='color: #FF0000;'>No Alerts</span>", max_len=None):
-    """Format alert data as HTML. Add full alerts only; stop before exceeding max_len (no mid-word truncation).
-    When max_len is set, use compact prefix so we can fit two full alerts (e.g. Brazoria)."""
+
+def _format_alert_html(enabled_text, has_alerts, alerts, no_alerts_text=ALERT_STATE_HTML["N"], max_len=None):
+    """Format alert data as HTML (or compact tokens). Add full alerts only; stop before
+    exceeding max_len (no mid-word truncation)."""
+    sep = _alert_sep()
     if not has_alerts or not alerts:
-        return f'"{enabled_text}<br>{no_alerts_text}"'
-    compact = max_len is not None
-    # Keep provider branding consistent regardless of compact mode.
-    prefix = f"{enabled_text}<br>"
+        return f'"{enabled_text}{sep}{no_alerts_text}"'
+    # Keep provider branding consistent regardless of max_len.
+    prefix = f"{enabled_text}{sep}"
     total = prefix
     first = True
     for alert in alerts[:5]:
         if not isinstance(alert, dict):
             continue
-        event = alert.get('event', 'Unknown')
-        severity = alert.get('severity', 'Unknown')
-        if severity == 'Extreme':
-            color = '#FF0000'
-        elif severity == 'Severe':
-            color = '#FF6600'
-        elif severity == 'Moderate':
-            color = '#FFCC00'
-        elif severity == 'Minor':
-            color = '#FFFF00'
-        else:
-            color = '#FF0000'
-        seg = f"<span style='color: {color};'><b>{event}</b></span>"
-        candidate = total + ("" if first else "<br>") + seg
+        seg = _alert_segment(alert.get('event', 'Unknown'), alert.get('severity', 'Unknown'))
+        candidate = total + ("" if first else sep) + seg
         if max_len is not None and len(candidate) > max_len:
             break
         total = candidate
         first = False
     if total == prefix:
-        head = prefix.rstrip("<br>") if compact else enabled_text
-        return f'"{head}<br>{no_alerts_text}"'
+        return f'"{enabled_text}{sep}{no_alerts_text}"'
     return f'"{total}"'
 
 
-def get_alerts_from_api(api_url, master_enable, nodes=None, product_name="SkywarnPlus-NG"):
-    """
-    Get alerts from SkywarnPlus-NG- or CANWarn-NG-style API.
-
-    Uses per-node alerts (alerts_by_node) when the API provides them and nodes
-    are configured, so each Supermon node shows alerts only for its counties.
-
-    API errors (timeout, connection refused, HTTP errors) are logged to
-    /tmp/skywarn_api_errors.log and to stderr (node-status-update.log when run
-    via systemd). Check those when the dashboard shows "API Offline" or no alerts.
-
-    Args:
-        api_url: Base URL for SkywarnPlus-NG API (e.g. http://10.0.0.5:8100).
-                 When using a reverse proxy at /skywarnplus-ng, include the path
-                 (e.g. https://host/skywarnplus-ng).
-        master_enable: "yes" to enable, anything else to disable.
-        nodes: List of node IDs (strings) from [general] NODE. Used for per-node alerts.
-
-    Returns:
-        Dict mapping node -> formatted HTML string (including quoted wrapper).
-        Fallback key "" used for nodes not in alerts_by_node when using global fallback.
-    """
-    product = (product_name or "SkywarnPlus-NG").strip()
-    if product.lower() in ("canwarn-ng", "canwarn_ng", "canwarn"):
-        github_link = '<a href=\'https://github.com/hardenedpenguin/CANWarn\' style=\'color: inherit; text-decoration: none;\'>CANWarn-NG</a>'
-        enabled_label = "CANWarn-NG Enabled"
-    else:
-        github_link = '<a href=\'https://github.com/hardenedpenguin/SkywarnPlus-NG\' style=\'color: inherit; text-decoration: none;\'>SkywarnPlus-NG</a>'
-        enabled_label = "SkywarnPlus-NG Enabled"
-
-    enabled_text = f'<span style=\'color: SpringGreen;\'><b><u>{github_link} Enabled</u></b></span>'
-    disabled_text = f'<span style=\'color: darkorange;\'><b><u>{github_link} Disabled</u></b></span>'
-    no_alerts_text = '<span style=\'color: #FF0000;\'>No Alerts</span>'
-    error_text = '<span style=\'color: #FF0000;\'>API Error</span>'
-
-    node_list = [n.strip() for n in (nodes or []) if n and str(n).strip()]
-    fallback = f'"{disabled_text}"'
-    if master_enable.lower() != "yes":
-        _debug_log("MASTER_ENABLE != yes | returning disabled for all")
-        return {n: fallback for n in node_list} if node_list else {"": fallback}
-
-    api_url = str(api_url).strip().rstrip('/')
-    # Use 127.0.0.1 instead of localhost to avoid IPv6 connection refused when
-    # SkywarnPlus-NG listens on IPv4 only (0.0.0.0:8100). Python may resolve
-    # localhost to ::1 first, which fails in that case.
-    try:
-        from urllib.parse import urlparse, urlunparse
-        p = urlparse(api_url)
-        if p.hostname and p.hostname.lower() == 'localhost':
-            netloc = '127.0.0.1' + ('' if p.port is None else f':{p.port}')
-            api_url = urlunparse(p._replace(netloc=netloc))
-    except Exception:
-        pass
-    status_url = f"{api_url}/api/status"
-    if node_list:
-        nodes_param = ",".join(str(n).strip() for n in node_list)
-        status_url = f"{status_url}?nodes={nodes_param}"
+def _fetch_alert_status(session, status_url, product, enabled_text, error_text):
+    """GET one /api/status URL. Returns (data, None) or (None, quoted error HTML)."""
     print(f"[{product}] GET {status_url}")
-
     try:
         from urllib.parse import urlparse
         _u = urlparse(status_url)
         _no_proxy = _u.hostname in ('127.0.0.1', 'localhost', '::1')
         _kw = {'proxies': {'http': None, 'https': None}} if _no_proxy else {}
-        response = requests.get(status_url, timeout=5, **_kw)
+        response = session.get(status_url, timeout=5, **_kw)
         if response.status_code != 200:
             body_snippet = getattr(response, 'text', None) or ""
             err_detail = ""
@@ -491,9 +645,8 @@ def get_alerts_from_api(api_url, master_enable, nodes=None, product_name="Skywar
             if err_detail:
                 msg += f" | {err_detail}"
             _log_skywarn_api_error(msg, status_code=response.status_code, body_snippet=body_snippet or err_detail)
-            _debug_log(f"API HTTP error {response.status_code} request={status_url} | returning API Error for all")
-            one = f'"{enabled_text}<br>{error_text}"'
-            return {n: one for n in node_list} if node_list else {"": one}
+            _debug_log(f"API HTTP error {response.status_code} request={status_url} | returning API Error")
+            return None, f'"{enabled_text}{_alert_sep()}{error_text}"'
 
         try:
             data = response.json()
@@ -502,56 +655,14 @@ def get_alerts_from_api(api_url, master_enable, nodes=None, product_name="Skywar
                 f"SkywarnPlus-NG API JSON decode error: {e}",
                 body_snippet=response.text[:500] if getattr(response, 'text', None) else None
             )
-            _debug_log("API JSON decode error | returning API Error for all")
-            one = f'"{enabled_text}<br>{error_text}"'
-            return {n: one for n in node_list} if node_list else {"": one}
+            _debug_log("API JSON decode error | returning API Error")
+            return None, f'"{enabled_text}{_alert_sep()}{error_text}"'
 
         if not isinstance(data, dict):
             _log_skywarn_api_error(f"{product} API returned non-dict response", body_snippet=str(type(data)))
-            _debug_log("API non-dict response | returning API Error for all")
-            one = f'"{enabled_text}<br>{error_text}"'
-            return {n: one for n in node_list} if node_list else {"": one}
-
-        alerts_by_node = data.get("alerts_by_node") or {}
-        has_alerts = data.get("has_alerts", False)
-        alerts = data.get("alerts", [])
-        if not isinstance(alerts, list):
-            alerts = []
-        abn_keys = list(alerts_by_node.keys()) if isinstance(alerts_by_node, dict) else []
-        print(f"[{product}] API OK 200 | has_alerts={has_alerts} | alerts_by_node keys={abn_keys}")
-
-        _debug_log(f"API request={status_url} | has_alerts={has_alerts} | alerts_by_node keys={abn_keys} | alerts count={len(alerts)}")
-
-        use_per_node = bool(node_list and isinstance(alerts_by_node, dict))
-        result = {}
-
-        def _snippet(s: str, n: int = 72) -> str:
-            t = (s or "").replace("\n", " ").strip()
-            return (t[:n] + "..") if len(t) > n else t
-
-        if use_per_node:
-            for node in node_list:
-                node_key = str(node).strip()
-                per = alerts_by_node.get(node_key) if node_key else None
-                if isinstance(per, dict) and "alerts" in per:
-                    has = per.get("has_alerts", False)
-                    alist = per.get("alerts", [])
-                    if not isinstance(alist, list):
-                        alist = []
-                    result[node] = _format_alert_html(enabled_text, has, alist, no_alerts_text, max_len=ALERT_MAX_LEN)
-                    _debug_log(f"node={node} source=per_node has_alerts={has} alerts={len(alist)} snippet={_snippet(result[node])}")
-                else:
-                    result[node] = _format_alert_html(enabled_text, has_alerts, alerts, no_alerts_text, max_len=ALERT_MAX_LEN)
-                    _debug_log(f"node={node} source=global_fallback has_alerts={has_alerts} snippet={_snippet(result[node])}")
-        else:
-            single = _format_alert_html(enabled_text, has_alerts, alerts, no_alerts_text, max_len=ALERT_MAX_LEN)
-            _debug_log(f"source=global single snippet={_snippet(single)}")
-            for node in node_list:
-                result[node] = single
-            if not node_list:
-                result[""] = single
-
-        return result
+            _debug_log("API non-dict response | returning API Error")
+            return None, f'"{enabled_text}{_alert_sep()}{error_text}"'
+        return data, None
 
     except requests.exceptions.Timeout:
         import traceback
@@ -559,34 +670,219 @@ def get_alerts_from_api(api_url, master_enable, nodes=None, product_name="Skywar
             f"{product} API timeout: {status_url}",
             body_snippet=traceback.format_exc()
         )
-        _debug_log(f"API TIMEOUT request={status_url} | returning API Timeout for all nodes")
-        one = f'"{enabled_text}<br><span style=\'color: #FF6600;\'>API Timeout</span>"'
-        return {n: one for n in node_list} if node_list else {"": one}
+        _debug_log(f"API TIMEOUT request={status_url} | returning API Timeout")
+        return None, f'"{enabled_text}{_alert_sep()}{_alert_state_text("T")}"'
     except requests.exceptions.ConnectionError as e:
         import traceback
         _log_skywarn_api_error(
             f"{product} API offline / connection refused: {status_url} | {e!r}",
             body_snippet=traceback.format_exc()
         )
-        _debug_log(f"API CONNECTION ERROR request={status_url} | {e!r} | returning API Offline for all nodes")
-        one = f'"{enabled_text}<br><span style=\'color: #FF6600;\'>API Offline</span>"'
-        return {n: one for n in node_list} if node_list else {"": one}
+        _debug_log(f"API CONNECTION ERROR request={status_url} | {e!r} | returning API Offline")
+        return None, f'"{enabled_text}{_alert_sep()}{_alert_state_text("O")}"'
     except Exception as e:
         import traceback
         _log_skywarn_api_error(
             f"{product} unexpected error: {e!r}",
             body_snippet=traceback.format_exc()
         )
-        _debug_log(f"API ERROR request={status_url} | {e!r} | returning API Error for all nodes")
-        one = f'"{enabled_text}<br>{error_text}"'
-        return {n: one for n in node_list} if node_list else {"": one}
+        _debug_log(f"API ERROR request={status_url} | {e!r} | returning API Error")
+        return None, f'"{enabled_text}{_alert_sep()}{error_text}"'
+
+
+def _max_severity(has_alerts, alerts):
+    """Highest CAP severity among alerts ('' when there are none)."""
+    if not has_alerts or not isinstance(alerts, list):
+        return ""
+    best = ""
+    for alert in alerts:
+        if isinstance(alert, dict):
+            sev = str(alert.get("severity", "Unknown"))
+            if SEVERITY_RANK.get(sev, 0) > SEVERITY_RANK.get(best, -1):
+                best = sev
+    return best
+
+
+def _alerts_for_nodes(data, node_list, product, status_url, enabled_text, no_alerts_text, severity_out=None):
+    """Format one /api/status response for the nodes it was requested for.
+
+    When severity_out is a dict it receives node -> highest alert severity.
+    """
+    if severity_out is None:
+        severity_out = {}
+    alerts_by_node = data.get("alerts_by_node") or {}
+    has_alerts = data.get("has_alerts", False)
+    alerts = data.get("alerts", [])
+    if not isinstance(alerts, list):
+        alerts = []
+    abn_keys = list(alerts_by_node.keys()) if isinstance(alerts_by_node, dict) else []
+    print(f"[{product}] API OK 200 | has_alerts={has_alerts} | alerts_by_node keys={abn_keys}")
+
+    _debug_log(f"API request={status_url} | has_alerts={has_alerts} | alerts_by_node keys={abn_keys} | alerts count={len(alerts)}")
+
+    use_per_node = bool(node_list and isinstance(alerts_by_node, dict))
+    result = {}
+
+    def _snippet(s: str, n: int = 72) -> str:
+        t = (s or "").replace("\n", " ").strip()
+        return (t[:n] + "..") if len(t) > n else t
+
+    if use_per_node:
+        for node in node_list:
+            node_key = str(node).strip()
+            per = alerts_by_node.get(node_key) if node_key else None
+            if isinstance(per, dict) and "alerts" in per:
+                has = per.get("has_alerts", False)
+                alist = per.get("alerts", [])
+                if not isinstance(alist, list):
+                    alist = []
+                result[node] = _format_alert_html(enabled_text, has, alist, no_alerts_text, max_len=ALERT_MAX_LEN)
+                severity_out[node] = _max_severity(has, alist)
+                _debug_log(f"node={node} source=per_node has_alerts={has} alerts={len(alist)} snippet={_snippet(result[node])}")
+            else:
+                result[node] = _format_alert_html(enabled_text, has_alerts, alerts, no_alerts_text, max_len=ALERT_MAX_LEN)
+                severity_out[node] = _max_severity(has_alerts, alerts)
+                _debug_log(f"node={node} source=global_fallback has_alerts={has_alerts} snippet={_snippet(result[node])}")
+    else:
+        single = _format_alert_html(enabled_text, has_alerts, alerts, no_alerts_text, max_len=ALERT_MAX_LEN)
+        _debug_log(f"source=global single snippet={_snippet(single)}")
+        for node in node_list:
+            result[node] = single
+            severity_out[node] = _max_severity(has_alerts, alerts)
+        if not node_list:
+            result[""] = single
+
+    return result
+
+
+def _chunk_nodes(node_list, chunk_size):
+    if chunk_size <= 0 or len(node_list) <= chunk_size:
+        return [node_list]
+    return [node_list[i:i + chunk_size] for i in range(0, len(node_list), chunk_size)]
+
+
+def _alert_provider_texts(product):
+    """(enabled_text, disabled_text) that head the ALERT value for a provider."""
+    if product.lower() in ("canwarn-ng", "canwarn_ng", "canwarn"):
+        github_link = '<a href=\'https://github.com/hardenedpenguin/CANWarn\' style=\'color: inherit; text-decoration: none;\'>CANWarn-NG</a>'
+        provider_code = "C"
+    else:
+        github_link = '<a href=\'https://github.com/hardenedpenguin/SkywarnPlus-NG\' style=\'color: inherit; text-decoration: none;\'>SkywarnPlus-NG</a>'
+        provider_code = "S"
+    if STATUS_FORMAT == "compact":
+        return f"~A|{provider_code}", f"~A|{provider_code}|D"
+    return (
+        f'<span style=\'color: SpringGreen;\'><b><u>{github_link} Enabled</u></b></span>',
+        f'<span style=\'color: darkorange;\'><b><u>{github_link} Disabled</u></b></span>',
+    )
+
+
+def get_alerts_from_api(api_url, master_enable, nodes=None, product_name="SkywarnPlus-NG",
+                        chunk_size=ALERT_CHUNK_SIZE, max_workers=ALERT_MAX_WORKERS, stats=None):
+    """
+    Get alerts from SkywarnPlus-NG- or CANWarn-NG-style API.
+
+    Uses per-node alerts (alerts_by_node) when the API provides them and nodes
+    are configured, so each Supermon node shows alerts only for its counties.
+
+    Large node lists are split into chunks of chunk_size nodes, fetched in
+    parallel over one pooled session. Each chunk's alerts_by_node is merged;
+    a failed chunk marks only its own nodes with the error text.
+
+    API errors (timeout, connection refused, HTTP errors) are logged to
+    /tmp/skywarn_api_errors.log and to stderr (node-status-update.log when run
+    via systemd). Check those when the dashboard shows "API Offline" or no alerts.
+
+    Args:
+        api_url: Base URL for SkywarnPlus-NG API (e.g. http://10.0.0.5:8100).
+                 When using a reverse proxy at /skywarnplus-ng, include the path
+                 (e.g. https://host/skywarnplus-ng).
+        master_enable: "yes" to enable, anything else to disable.
+        nodes: List of node IDs (strings) from [general] NODE. Used for per-node alerts.
+        chunk_size: Nodes per request (0 = one request for all nodes).
+        max_workers: Maximum concurrent chunk requests.
+        stats: Optional dict filled with requests, failed_chunks, failed_nodes,
+               chunk_ms (per-chunk latency) for the run summary, and severity
+               (node -> highest alert severity) for write scheduling.
+
+    Returns:
+        Dict mapping node -> formatted HTML string (including quoted wrapper).
+        Fallback key "" used for nodes not in alerts_by_node when using global fallback.
+    """
+    product = (product_name or "SkywarnPlus-NG").strip()
+    enabled_text, disabled_text = _alert_provider_texts(product)
+    no_alerts_text = _alert_state_text("N")
+    error_text = _alert_state_text("X")
+
+    if stats is None:
+        stats = {}
+    stats.update(requests=0, failed_chunks=0, failed_nodes=0, chunk_ms=[], severity={})
+
+    node_list = [n.strip() for n in (nodes or []) if n and str(n).strip()]
+    fallback = f'"{disabled_text}"'
+    if master_enable.lower() != "yes":
+        _debug_log("MASTER_ENABLE != yes | returning disabled for all")
+        return {n: fallback for n in node_list} if node_list else {"": fallback}
+
+    api_url = str(api_url).strip().rstrip('/')
+    # Use 127.0.0.1 instead of localhost to avoid IPv6 connection refused when
+    # SkywarnPlus-NG listens on IPv4 only (0.0.0.0:8100). Python may resolve
+    # localhost to ::1 first, which fails in that case.
+    try:
+        from urllib.parse import urlparse, urlunparse
+        p = urlparse(api_url)
+        if p.hostname and p.hostname.lower() == 'localhost':
+            netloc = '127.0.0.1' + ('' if p.port is None else f':{p.port}')
+            api_url = urlunparse(p._replace(netloc=netloc))
+    except Exception:
+        pass
+    base_status_url = f"{api_url}/api/status"
+    chunks = _chunk_nodes(node_list, chunk_size)
+
+    def _fetch(chunk):
+        status_url = base_status_url
+        if chunk:
+            status_url = f"{status_url}?nodes={','.join(chunk)}"
+        started = time.monotonic()
+        data, error_html = _fetch_alert_status(session, status_url, product, enabled_text, error_text)
+        elapsed_ms = int((time.monotonic() - started) * 1000)
+        if data is not None:
+            formatted = _alerts_for_nodes(data, chunk, product, status_url, enabled_text, no_alerts_text,
+                                          severity_out=stats["severity"])
+            return formatted, False, elapsed_ms
+        return ({n: error_html for n in chunk} if chunk else {"": error_html}), True, elapsed_ms
+
+    from concurrent.futures import ThreadPoolExecutor
+    from requests.adapters import HTTPAdapter
+    workers = max(1, min(int(max_workers or 1), len(chunks)))
+    result = {}
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if len(chunks) == 1:
+            outcomes = [_fetch(chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(_fetch, chunks))
+
+    for chunk, (chunk_result, failed, elapsed_ms) in zip(chunks, outcomes):
+        result.update(chunk_result)
+        stats["requests"] += 1
+        stats["chunk_ms"].append(elapsed_ms)
+        if failed:
+            stats["failed_chunks"] += 1
+            stats["failed_nodes"] += len(chunk)
+    if len(chunks) > 1:
+        print(f"[{product}] {len(chunks)} chunk(s) of <= {chunk_size} node(s) | failed chunks={stats['failed_chunks']}")
+    return result
 
 def _rpt_conf_exists():
     return os.path.isfile("/etc/asterisk/rpt.conf")
 
 
-def update_node_variables(node, cpu_up, cpu_load, cpu_temp_dsp, wx, disk_usage, alert):
-    """Update RPT variables for a node. Returns 'ok', 'skip_rpt', 'error_vars', or 'error_alert'."""
+def _node_in_rpt_conf(node):
+    """True when rpt.conf has a [node] stanza (logs why not otherwise)."""
     # Match section headers: [546051] or [546051](node-main) etc. at line start
     check_node_command = ["grep", "-qE", rf"^[[:blank:]]*\[{re.escape(str(node))}\]([[:blank:]]*\([^)]*\))?[[:blank:]]*$", "/etc/asterisk/rpt.conf"]
     process_check = subprocess.run(check_node_command, capture_output=True, text=True)
@@ -599,8 +895,12 @@ def update_node_variables(node, cpu_up, cpu_load, cpu_temp_dsp, wx, disk_usage,
                 pass  # Already logged once at start
             else:
                 print(f"Error checking node {node} in /etc/asterisk/rpt.conf: {err}")
-        return "skip_rpt"
+        return False
+    return True
+
 
+def set_node_stats(node, cpu_up, cpu_load, cpu_temp_dsp, wx, disk_usage):
+    """Set the cosmetic stats variables. Returns 'ok' or 'error_vars'."""
     command = [
         "/usr/sbin/asterisk",
         "-rx",
@@ -611,6 +911,25 @@ def update_node_variables(node, cpu_up, cpu_load, cpu_temp_dsp, wx, disk_usage,
         print(f"Error setting variables for node {node}: {result.stderr}")
         return "error_vars"
     print(f"Updated Variables Node {node} using rpt set variable")
+    return "ok"
+
+
+def set_node_alert(node, alert):
+    """Set the ALERT variable. Returns 'ok' or 'error_alert'."""
+    if LOW_WRITE:
+        # Same escaping as the generated script below, without the two temp files.
+        alert_esc = alert.rstrip("\n").replace("\\", "\\\\").replace('"', '\\"')
+        result_alert = subprocess.run(
+            ["/usr/sbin/asterisk", "-rx", f'rpt set variable {node} ALERT="{alert_esc}"'],
+            capture_output=True, text=True, check=False,
+        )
+        if result_alert.returncode != 0:
+            print(f"Error setting ALERT for node {node}: return code {result_alert.returncode}")
+            if result_alert.stderr:
+                print(f"Stderr: {result_alert.stderr[:200]}")
+            return "error_alert"
+        print(f"Updated ALERT Node {node} using rpt set variable")
+        return "ok"
 
     import tempfile
     with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as tmp_alert_file:
@@ -646,8 +965,88 @@ rm -f "{alert_file_path}"
     return "ok"
 
 
+def update_node_variables(node, cpu_up, cpu_load, cpu_temp_dsp, wx, disk_usage, alert):
+    """Update RPT variables for a node. Returns 'ok', 'skip_rpt', 'error_vars', or 'error_alert'."""
+    if not _node_in_rpt_conf(node):
+        return "skip_rpt"
+    status = set_node_stats(node, cpu_up, cpu_load, cpu_temp_dsp, wx, disk_usage)
+    if status != "ok":
+        return status
+    return set_node_alert(node, alert)
+
+
+def _alert_write_priority(severity, changed):
+    if not changed:
+        return WRITE_PRIORITY_STATS
+    if severity in ("Extreme", "Severe"):
+        return WRITE_PRIORITY_SEVERE_ALERT
+    return WRITE_PRIORITY_ALERT
+
+
+class WriteQueue:
+    """Pending rpt variable writes, lowest priority value first.
+
+    Writes deferred by the previous cycle (carried) run before others of the
+    same priority; otherwise config order is kept.
+    """
+
+    def __init__(self, carried=()):
+        self._heap = []
+        self._seq = 0
+        self._carried = {tuple(item) for item in carried}
+
+    def push(self, priority, node, kind, write):
+        carried = 0 if (node, kind) in self._carried else 1
+        heapq.heappush(self._heap, (priority, carried, self._seq, node, kind, write))
+        self._seq += 1
+
+    def run(self, deadline, on_result, max_priority=None):
+        """Run writes until the queue is empty, the deadline passes, or only
+        writes above max_priority remain."""
+        while self._heap:
+            if max_priority is not None and self._heap[0][0] > max_priority:
+                return
+            if time.monotonic() >= deadline:
+                return
+            _, _, _, node, kind, write = heapq.heappop(self._heap)
+            on_result(node, kind, write())
+
+    def pending(self):
+        return [(node, kind) for _, _, _, node, kind, _ in sorted(self._heap, key=lambda e: e[:3])]
+
+
+def _cycle_state_path():
+    return os.path.join(_state_dir(), "supermon-node-status-state.json")
+
+
+def _load_cycle_state():
+    try:
+        with open(_cycle_state_path(), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    if not isinstance(data.get("alerts"), dict):
+        data["alerts"] = {}
+    if not isinstance(data.get("deferred"), list):
+        data["deferred"] = []
+    return data
+
+
+def _save_cycle_state(state, previous):
+    """Persist last-written ALERT hashes and deferred writes (only when changed)."""
+    if state == previous:
+        return
+    try:
+        with open(_cycle_state_path(), "w", encoding="utf-8") as f:
+            json.dump(state, f)
+    except OSError:
+        pass
+
+
 if __name__ == "__main__":
-    _debug_log_clear()
+    run_started = time.monotonic()
     script_dir = os.path.dirname(os.path.realpath(__file__))
     config_file = os.path.join(script_dir, "node_info.ini")
 
@@ -659,6 +1058,32 @@ if __name__ == "__main__":
     config.read(config_file)
     print(f"[NodeStatus] config={config_file}")
 
+    LOW_WRITE = _config_flag_yes(config.get("general", "LOW_WRITE", fallback="no"))
+    try:
+        LOG_MAX_BYTES = int(config.get("general", "LOG_MAX_KB", fallback="256")) * 1024
+    except ValueError:
+        pass
+    if LOW_WRITE:
+        LOW_WRITE_DIR = config.get("general", "LOW_WRITE_DIR", fallback=LOW_WRITE_DIR).strip() or LOW_WRITE_DIR
+        try:
+            os.makedirs(LOW_WRITE_DIR, exist_ok=True)
+        except OSError:
+            print(f"[NodeStatus] LOW_WRITE_DIR {LOW_WRITE_DIR} unusable; caches stay in {_saytime_tmp_dir()}")
+            LOW_WRITE_DIR = _saytime_tmp_dir()
+        os.environ.setdefault("SUPERMON_WEATHER_CACHE_DIR", LOW_WRITE_DIR)
+        _rotate_stdout_log()
+        print(f"[NodeStatus] Low-write mode: caches in {LOW_WRITE_DIR}, logs batched")
+    _debug_log_clear()
+    io_start = _proc_io()
+
+    STATUS_FORMAT = "compact" if config.get("general", "STATUS_FORMAT", fallback="html").strip().lower() == "compact" else "html"
+    GEOCODER = config.get("general", "GEOCODER", fallback=GEOCODER).strip().lower() or GEOCODER
+    GEOCODER_INDEX = config.get("general", "GEOCODER_INDEX", fallback=GEOCODER_INDEX).strip() or GEOCODER_INDEX
+    try:
+        GEOCODER_MAX_KM = float(config.get("general", "GEOCODER_MAX_KM", fallback=str(GEOCODER_MAX_KM)))
+    except ValueError:
+        pass
+
     nodes = config.get("general", "NODE", fallback="").split()
     wx_code = config.get("general", "WX_CODE", fallback="")
     wx_location = config.get("general", "WX_LOCATION", fallback="")
@@ -703,13 +1128,11 @@ if __name__ == "__main__":
 
     print(f"[NodeStatus] ALERT_PRODUCT={product_name!r} API_URL={api_url!r} MASTER_ENABLE={master_enable!r} NODES={nodes}")
 
-    cpu_up = get_uptime()
-    cpu_load = get_cpu_load()
-    cpu_temp_dsp = get_cpu_temperature(temp_unit)
-    if wx_use_gps:
-        print("[NodeStatus] WX_USE_GPS=yes or weather.ini location_source=gps")
-    wx = get_weather(wx_code, wx_location, use_gps=wx_use_gps)
-    disk_usage_info = get_disk_usage()
+    try:
+        cycle_budget = float(config.get("general", "CYCLE_BUDGET_SECONDS", fallback=str(CYCLE_BUDGET_SECONDS)))
+    except ValueError:
+        cycle_budget = CYCLE_BUDGET_SECONDS
+    deadline = run_started + cycle_budget
 
     node_list = []
     seen = set()
@@ -724,24 +1147,85 @@ if __name__ == "__main__":
     if not node_list:
         _debug_log("exit early: no nodes configured")
         print("No nodes specified in the configuration file.")
-        exit(0)
+        _finish_run(io_start)
+
+    if _config_flag_yes(config.get("general", "METRIC_HISTORY", fallback="yes")):
+        history_dir = config.get("general", "METRIC_HISTORY_DIR", fallback="").strip() or node_metric_history.history_dir()
+        try:
+            history_capacity = int(config.get("general", "METRIC_HISTORY_CAPACITY", fallback=str(node_metric_history.DEFAULT_CAPACITY)))
+        except ValueError:
+            history_capacity = node_metric_history.DEFAULT_CAPACITY
+        persist_dir = history_dir
+        if LOW_WRITE:
+            # Live rings on tmpfs; persistent copy refreshed every METRIC_HISTORY_FLUSH_MINUTES
+            history_dir = os.path.join(LOW_WRITE_DIR, "metrics")
+            if not os.path.isdir(history_dir):
+                os.makedirs(history_dir, exist_ok=True)
+                node_metric_history.sync_rings(persist_dir, history_dir)
+                _touch(os.path.join(history_dir, ".flushed"))
+        node_metric_history.record_node_samples(
+            history_dir,
+            node_list,
+            {"load1": _read_load1(), "temp_c": _read_cpu_temp_celsius(), "disk_pct": _disk_used_percent()},
+            capacity=max(1, history_capacity),
+        )
+        if LOW_WRITE:
+            try:
+                flush_minutes = float(config.get("general", "METRIC_HISTORY_FLUSH_MINUTES", fallback="60"))
+            except ValueError:
+                flush_minutes = 60.0
+            stamp = os.path.join(history_dir, ".flushed")
+            try:
+                last_flush = os.path.getmtime(stamp)
+            except OSError:
+                last_flush = 0.0
+            if time.time() - last_flush >= flush_minutes * 60:
+                copied = node_metric_history.sync_rings(history_dir, persist_dir)
+                _touch(stamp)
+                print(f"[NodeStatus] Metric history flushed to {persist_dir} ({copied} ring(s))")
 
     if not _rpt_conf_exists():
         _debug_log(f"exit early: no rpt.conf | nodes={node_list}")
         print("[NodeStatus] /etc/asterisk/rpt.conf not found; cannot update any node variables.")
         print(f"[NodeStatus] Summary: all {len(node_list)} node(s) skipped (no rpt.conf)")
-        exit(0)
+        _finish_run(io_start)
 
     print(f"[NodeStatus] Updating {len(node_list)} node(s): {', '.join(node_list)}")
-    alerts_map = get_alerts_from_api(api_url, master_enable, nodes=node_list, product_name=product_name)
+    try:
+        alert_chunk_size = int(config.get("general", "ALERT_CHUNK_SIZE", fallback=str(ALERT_CHUNK_SIZE)))
+        alert_workers = int(config.get("general", "ALERT_MAX_WORKERS", fallback=str(ALERT_MAX_WORKERS)))
+    except ValueError:
+        alert_chunk_size, alert_workers = ALERT_CHUNK_SIZE, ALERT_MAX_WORKERS
+    alert_stats = {}
+    alerts_map = get_alerts_from_api(
+        api_url, master_enable, nodes=node_list, product_name=product_name,
+        chunk_size=alert_chunk_size, max_workers=alert_workers, stats=alert_stats,
+    )
     default_alert = alerts_map.get(node_list[0], "") if node_list else ""
+    severities = alert_stats.get("severity", {})
 
     def _snippet(s: str, n: int = 72) -> str:
         t = (s or "").replace("\n", " ").strip()
         return (t[:n] + "..") if len(t) > n else t
 
-    summary = []
+    previous_state = _load_cycle_state()
+    state = {"alerts": dict(previous_state["alerts"]), "deferred": []}
+    queue = WriteQueue(carried=previous_state["deferred"])
+    results = {}
+    active_nodes = []
+
+    def _record(node, kind, status):
+        results.setdefault(node, {})[kind] = status
+        _debug_log(f"WRITE node={node} kind={kind} status={status}")
+        if kind == "alert" and status == "ok":
+            state["alerts"][node] = alert_hashes[node]
+
+    alert_hashes = {}
     for node in node_list:
+        if not _node_in_rpt_conf(node):
+            results[node] = {"skip": "skip_rpt"}
+            continue
+        active_nodes.append(node)
         a = alerts_map.get(node)
         b = alerts_map.get("")
         alert = a or b or default_alert
@@ -753,19 +1237,65 @@ if __name__ == "__main__":
             src = "default_alert"
         if isinstance(alert, str) and alert.startswith('"') and alert.endswith('"'):
             alert = alert[1:-1]
-        _debug_log(f"WRITE node={node} source={src} len={len(alert)} snippet={_snippet(alert)}")
-        status = update_node_variables(node, cpu_up, cpu_load, cpu_temp_dsp, wx, disk_usage_info, alert)
-        _debug_log(f"WRITE node={node} status={status}")
-        if status == "ok":
-            summary.append(f"{node} OK")
-        elif status == "skip_rpt":
+        alert_hashes[node] = hashlib.sha1(alert.encode("utf-8")).hexdigest()
+        changed = previous_state["alerts"].get(node) != alert_hashes[node]
+        severity = severities.get(node, "")
+        priority = _alert_write_priority(severity, changed)
+        _debug_log(f"QUEUE node={node} ALERT source={src} priority={priority} severity={severity or '-'} changed={changed} len={len(alert)} snippet={_snippet(alert)}")
+        queue.push(priority, node, "alert", lambda node=node, alert=alert: set_node_alert(node, alert))
+
+    # Changed ALERTs go out before the (possibly slow) stats and weather lookups.
+    queue.run(deadline, _record, max_priority=WRITE_PRIORITY_ALERT)
+
+    cpu_up = get_uptime()
+    cpu_load = get_cpu_load()
+    cpu_temp_dsp = get_cpu_temperature(temp_unit)
+    if wx_use_gps:
+        print("[NodeStatus] WX_USE_GPS=yes or weather.ini location_source=gps")
+    wx_backend = config.get("general", "WX_BACKEND", fallback="native")
+    wx = get_weather(wx_code, wx_location, use_gps=wx_use_gps, backend=wx_backend)
+    disk_usage_info = get_disk_usage()
+
+    for node in active_nodes:
+        queue.push(
+            WRITE_PRIORITY_STATS, node, "stats",
+            lambda node=node: set_node_stats(node, cpu_up, cpu_load, cpu_temp_dsp, wx, disk_usage_info),
+        )
+    queue.run(deadline, _record)
+
+    deferred = queue.pending()
+    state["deferred"] = [[node, kind] for node, kind in deferred]
+    state["deferred"] += [[n, k] for n, r in results.items() for k, st in r.items() if st.startswith("error")]
+    if deferred:
+        listing = ", ".join(f"{node}/{kind}" for node, kind in deferred)
+        print(f"[NodeStatus] Cycle budget of {cycle_budget:g}s reached; deferred {len(deferred)} write(s) to next cycle: {listing}")
+        _debug_log(f"DEFERRED {listing}")
+    for node, kind in deferred:
+        results.setdefault(node, {})[kind] = "deferred"
+    _save_cycle_state(state, previous_state)
+
+    summary = []
+    for node in node_list:
+        r = results.get(node, {})
+        if r.get("skip") == "skip_rpt":
             summary.append(f"{node} skipped (not in rpt.conf)")
-        elif status == "error_vars":
+        elif r.get("stats") == "error_vars":
             summary.append(f"{node} error (vars)")
-        else:
+        elif r.get("alert") == "error_alert":
             summary.append(f"{node} error (ALERT)")
+        elif "deferred" in r.values():
+            kinds = "+".join(k if k == "stats" else "ALERT" for k, st in r.items() if st == "deferred")
+            summary.append(f"{node} deferred ({kinds})")
+        else:
+            summary.append(f"{node} OK")
 
     print(f"[NodeStatus] Summary: {' | '.join(summary)}")
+    if alert_stats.get("requests"):
+        print(
+            f"[NodeStatus] Alerts API: requests={alert_stats['requests']} "
+            f"chunk_ms={alert_stats['chunk_ms']} failed_chunks={alert_stats['failed_chunks']} "
+            f"failed_nodes={alert_stats['failed_nodes']}"
+        )
     _debug_log(f"run complete | summary={' | '.join(summary)}")
-    exit(0)
+    _finish_run(io_start)
 
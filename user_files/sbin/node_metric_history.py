@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Fixed-size metric history for ast_node_status_update.py.
+
+One ring-buffer file per node and metric (e.g. <dir>/546051/temp_c.ring). Each
+file is a small header followed by a preallocated array of (timestamp, value)
+records, updated in place through mmap, so history never grows past
+capacity * 8 bytes and needs no database.
+
+Usage:
+  node_metric_history.py read --node N --metric temp_c [--hours 24] [--step 300] [--dir DIR]
+  node_metric_history.py list [--dir DIR]
+
+`read` prints JSON: {"node", "metric", "step", "points": [[ts, value|null], ...]}.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+
+DEFAULT_DIR = "/var/lib/supermon-ng/metrics"
+# 7 days of 5-minute samples
+DEFAULT_CAPACITY = 2016
+
+METRICS = ("load1", "temp_c", "disk_pct")
+
+MAGIC = b"SMRB"
+VERSION = 1
+# magic, version, record size, capacity, head (next slot), count
+HEADER = struct.Struct("<4sHHIII")
+RECORD = struct.Struct("<If")
+HEADER_SIZE = 32
+
+_SAFE_RE = re.compile(r"^[a-zA-Z0-9_-]+$")
+
+
+def history_dir():
+    return os.environ.get("SUPERMON_METRIC_HISTORY_DIR", DEFAULT_DIR)
+
+
+def ring_path(base_dir, node, metric):
+    node, metric = str(node), str(metric)
+    if not _SAFE_RE.match(node) or not _SAFE_RE.match(metric):
+        raise ValueError(f"Invalid node/metric name: {node!r}/{metric!r}")
+    return os.path.join(base_dir, node, f"{metric}.ring")
+
+
+def _create(path, capacity):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, capacity, 0, 0).ljust(HEADER_SIZE, b"\0"))
+        f.truncate(HEADER_SIZE + capacity * RECORD.size)
+    os.replace(tmp, path)
+
+
+def _header(buf):
+    magic, version, rec_size, capacity, head, count = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION or rec_size != RECORD.size:
+        raise ValueError("not a metric ring file")
+    return capacity, head, count
+
+
+def append_sample(base_dir, node, metric, value, ts=None, capacity=DEFAULT_CAPACITY):
+    """Write one sample into the node/metric ring, creating it on first use."""
+    if value is None:
+        return
+    path = ring_path(base_dir, node, metric)
+    if not os.path.exists(path):
+        _create(path, capacity)
+    with open(path, "r+b") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0) as buf:
+                cap, head, count = _header(buf)
+                RECORD.pack_into(buf, HEADER_SIZE + head * RECORD.size, int(ts or time.time()), float(value))
+                struct.pack_into("<II", buf, 12, (head + 1) % cap, min(count + 1, cap))
+        except ValueError:
+            f.close()
+            _create(path, capacity)
+            append_sample(base_dir, node, metric, value, ts, capacity)
+
+
+def read_samples(base_dir, node, metric, since=0):
+    """Return [(ts, value), ...] oldest first, limited to ts >= since."""
+    path = ring_path(base_dir, node, metric)
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            cap, head, count = _header(buf)
+            start = (head - count) % cap
+            out = []
+            for i in range(count):
+                ts, value = RECORD.unpack_from(buf, HEADER_SIZE + ((start + i) % cap) * RECORD.size)
+                if ts >= since:
+                    out.append((ts, value))
+            return out
+    except (OSError, ValueError):
+        return []
+
+
+def read_series(base_dir, node, metric, hours=24.0, step=300, now=None):
+    """Downsample the last `hours` into `step`-second buckets (mean); gaps are None."""
+    now = int(now or time.time())
+    step = max(1, int(step))
+    end = now - now % step + step
+    start = end - int(hours * 3600)
+    start -= start % step
+    buckets = {}
+    for ts, value in read_samples(base_dir, node, metric, since=start):
+        if ts >= end:
+            continue
+        acc = buckets.setdefault((ts - start) // step, [0.0, 0])
+        acc[0] += value
+        acc[1] += 1
+    points = []
+    for i in range((end - start) // step):
+        acc = buckets.get(i)
+        points.append([start + i * step, round(acc[0] / acc[1], 3) if acc else None])
+    return points
+
+
+def record_node_samples(base_dir, nodes, samples, ts=None, capacity=DEFAULT_CAPACITY):
+    """Append one cycle's numeric samples ({metric: value}) for every node."""
+    ts = int(ts or time.time())
+    for node in nodes:
+        for metric, value in samples.items():
+            try:
+                append_sample(base_dir, node, metric, value, ts=ts, capacity=capacity)
+            except (OSError, ValueError) as e:
+                print(f"[NodeStatus] Metric history write failed ({node}/{metric}): {e}")
+
+
+def sync_rings(src_dir, dst_dir):
+    """Copy every ring file under src_dir into dst_dir (atomic per file).
+
+    Low-write mode keeps the live rings on tmpfs and uses this to seed them from
+    persistent storage and to flush them back periodically. Returns files copied.
+    """
+    copied = 0
+    if not os.path.isdir(src_dir):
+        return copied
+    for node in os.listdir(src_dir):
+        node_src = os.path.join(src_dir, node)
+        if not _SAFE_RE.match(node) or not os.path.isdir(node_src):
+            continue
+        for name in os.listdir(node_src):
+            if not name.endswith(".ring"):
+                continue
+            dst = os.path.join(dst_dir, node, name)
+            try:
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                with open(os.path.join(node_src, name), "rb") as f:
+                    data = f.read()
+                with open(f"{dst}.tmp", "wb") as f:
+                    f.write(data)
+                os.replace(f"{dst}.tmp", dst)
+                copied += 1
+            except OSError as e:
+                print(f"[NodeStatus] Metric history sync failed ({node}/{name}): {e}")
+    return copied
+
+
+def main(argv=None):
+    # --dir is accepted before or after the subcommand
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--dir", default=argparse.SUPPRESS)
+    parser = argparse.ArgumentParser(description="Read node metric history.", parents=[common])
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_read = sub.add_parser("read", parents=[common])
+    p_read.add_argument("--node", required=True)
+    p_read.add_argument("--metric", required=True)
+    p_read.add_argument("--hours", type=float, default=24.0)
+    p_read.add_argument("--step", type=int, default=300)
+    sub.add_parser("list", parents=[common])
+    args = parser.parse_args(argv)
+    if not hasattr(args, "dir"):
+        args.dir = history_dir()
+
+    if args.command == "list":
+        out = {}
+        if os.path.isdir(args.dir):
+            for node in sorted(os.listdir(args.dir)):
+                node_dir = os.path.join(args.dir, node)
+                if os.path.isdir(node_dir):
+                    out[node] = sorted(n[:-5] for n in os.listdir(node_dir) if n.endswith(".ring"))
+        print(json.dumps(out))
+        return 0
+
+    try:
+        points = read_series(args.dir, args.node, args.metric, hours=args.hours, step=args.step)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(json.dumps({"node": args.node, "metric": args.metric, "step": args.step, "points": points}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""In-process weather lookup for ast_node_status_update.py.
+
+Replaces spawning weather.rb / weather.pl / weather.sh on every cycle with
+HTTP calls over one pooled requests session. Reads the same weather.ini the
+saytime scripts use (Temperature_mode, process_condition, weather_provider,
+default_country) and returns the same "temp, conditions" text that goes inside
+the WX variable. Returns None when it cannot answer, so the caller can fall
+back to the legacy scripts.
+
+Backends are looked up by name in BACKENDS; register_backend() adds another.
+Base URLs can be pointed at a local stand-in with the SUPERMON_WEATHER_*_URL
+environment variables (or the matching *_url keys in weather.ini).
+
+Usage:
+  node_weather.py CODE            # postal code, ICAO airport, "lat,lon" or place name
+  node_weather.py --gps LAT,LON
+"""
+
+import configparser
+import json
+import os
+import re
+import sys
+import time
+
+import requests
+
+DEFAULT_CONFIG = "/etc/asterisk/local/weather.ini"
+GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+METAR_URL = "https://aviationweather.gov/api/data/metar"
+HTTP_TIMEOUT = 5
+GEOCODE_CACHE_MAX_AGE = 30 * 24 * 3600
+
+USER_AGENT = "Supermon-NG/1.0 (AllStar node status; amateur radio dashboard)"
+
+# WMO weather interpretation codes (Open-Meteo "weather_code")
+WMO_CONDITIONS = {
+    0: "Clear",
+    1: "Mostly Clear",
+    2: "Partly Cloudy",
+    3: "Overcast",
+    45: "Fog",
+    48: "Freezing Fog",
+    51: "Light Drizzle",
+    53: "Drizzle",
+    55: "Heavy Drizzle",
+    56: "Freezing Drizzle",
+    57: "Freezing Drizzle",
+    61: "Light Rain",
+    63: "Rain",
+    65: "Heavy Rain",
+    66: "Freezing Rain",
+    67: "Freezing Rain",
+    71: "Light Snow",
+    73: "Snow",
+    75: "Heavy Snow",
+    77: "Snow Grains",
+    80: "Rain Showers",
+    81: "Rain Showers",
+    82: "Heavy Rain Showers",
+    85: "Snow Showers",
+    86: "Heavy Snow Showers",
+    95: "Thunderstorm",
+    96: "Thunderstorm with Hail",
+    99: "Thunderstorm with Hail",
+}
+
+# METAR present-weather groups, most significant first
+METAR_CONDITIONS = (
+    ("TS", "Thunderstorm"),
+    ("FZRA", "Freezing Rain"),
+    ("SN", "Snow"),
+    ("RA", "Rain"),
+    ("DZ", "Drizzle"),
+    ("FG", "Fog"),
+    ("BR", "Mist"),
+    ("HZ", "Haze"),
+)
+METAR_SKY = {"SKC": "Clear", "CLR": "Clear", "FEW": "Mostly Clear", "SCT": "Partly Cloudy", "BKN": "Mostly Cloudy", "OVC": "Overcast"}
+
+_session = None
+
+
+def http_session():
+    """Shared keep-alive session for every weather request in this process."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.headers["User-Agent"] = USER_AGENT
+    return _session
+
+
+def load_settings(path=None):
+    """Relevant weather.ini values with saytime defaults."""
+    path = path or os.environ.get("WEATHER_CONFIG", DEFAULT_CONFIG)
+    ini = configparser.ConfigParser()
+    try:
+        ini.read(path)
+    except (configparser.Error, UnicodeDecodeError):
+        pass
+    section = "weather" if ini.has_section("weather") else "DEFAULT"
+
+    def get(key, default=""):
+        return ini.get(section, key, fallback=default).strip().strip('"')
+
+    return {
+        "temperature_mode": (get("Temperature_mode", "F") or "F").upper()[:1],
+        "process_condition": get("process_condition", "YES").lower() in ("yes", "1", "true", "on"),
+        "provider": get("weather_provider", "openmeteo").lower() or "openmeteo",
+        "default_country": get("default_country", "us").upper() or "US",
+        "geocode_url": os.environ.get("SUPERMON_WEATHER_GEOCODE_URL") or get("geocode_url", GEOCODE_URL),
+        "forecast_url": os.environ.get("SUPERMON_WEATHER_FORECAST_URL") or get("forecast_url", FORECAST_URL),
+        "metar_url": os.environ.get("SUPERMON_WEATHER_METAR_URL") or get("metar_url", METAR_URL),
+    }
+
+
+def format_report(temp_c, condition, settings):
+    """Match the saytime weather script verbose output: '72°F, Partly Cloudy'."""
+    if settings["temperature_mode"] == "C":
+        temp = f"{round(temp_c)}°C"
+    else:
+        temp = f"{round(temp_c * 9 / 5 + 32)}°F"
+    if condition and settings["process_condition"]:
+        return f"{temp}, {condition}"
+    return temp
+
+
+def _get_json(url, params):
+    response = http_session().get(url, params=params, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def _geocode_cache_path():
+    cache_dir = os.environ.get("SUPERMON_WEATHER_CACHE_DIR") or os.environ.get("SAYTIME_TMP", "/tmp")
+    return os.path.join(cache_dir, "supermon-geocode-cache.json")
+
+
+def _geocode(code, settings):
+    """Resolve a postal code or place name to (lat, lon); cached on disk."""
+    key = f"{settings['default_country']}:{code.lower()}"
+    path = _geocode_cache_path()
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, json.JSONDecodeError):
+        cache = {}
+    entry = cache.get(key)
+    if isinstance(entry, dict) and time.time() - float(entry.get("ts", 0)) <= GEOCODE_CACHE_MAX_AGE:
+        return entry["lat"], entry["lon"]
+
+    params = {"name": code, "count": 1, "format": "json"}
+    if re.fullmatch(r"[0-9A-Za-z -]{3,10}", code) and any(c.isdigit() for c in code):
+        params["countryCode"] = settings["default_country"]
+    data = _get_json(settings["geocode_url"], params)
+    results = data.get("results") if isinstance(data, dict) else None
+    if not results:
+        return None
+    lat, lon = float(results[0]["latitude"]), float(results[0]["longitude"])
+    cache[key] = {"lat": lat, "lon": lon, "ts": time.time()}
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+    return lat, lon
+
+
+def openmeteo_backend(code, settings, lat=None, lon=None):
+    """Current conditions from Open-Meteo for lat/lon, 'lat,lon', postal code or place."""
+    if lat is None or lon is None:
+        m = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*", code or "")
+        if m:
+            lat, lon = float(m.group(1)), float(m.group(2))
+        else:
+            coords = _geocode(code, settings)
+            if coords is None:
+                return None
+            lat, lon = coords
+    data = _get_json(settings["forecast_url"], {
+        "latitude": lat,
+        "longitude": lon,
+        "current": "temperature_2m,weather_code",
+        "temperature_unit": "celsius",
+    })
+    current = data.get("current") if isinstance(data, dict) else None
+    if not isinstance(current, dict) or current.get("temperature_2m") is None:
+        return None
+    condition = WMO_CONDITIONS.get(int(current.get("weather_code", -1)), "")
+    return format_report(float(current["temperature_2m"]), condition, settings)
+
+
+def metar_backend(code, settings, lat=None, lon=None):
+    """Current observation for a 4-letter ICAO airport code."""
+    if not code or not re.fullmatch(r"[A-Za-z]{4}", code):
+        return None
+    data = _get_json(settings["metar_url"], {"ids": code.upper(), "format": "json"})
+    if not isinstance(data, list) or not data or data[0].get("temp") is None:
+        return None
+    obs = data[0]
+    raw = f" {obs.get('rawOb', '')} "
+    condition = ""
+    for token, text in METAR_CONDITIONS:
+        if re.search(rf"\s[-+]?(VC)?[A-Z]*{token}[A-Z]*\s", raw):
+            condition = text
+            break
+    if not condition:
+        for cover in reversed(("SKC", "CLR", "FEW", "SCT", "BKN", "OVC")):
+            if re.search(rf"\s{cover}\d*", raw):
+                condition = METAR_SKY[cover]
+                break
+    return format_report(float(obs["temp"]), condition, settings)
+
+
+BACKENDS = {
+    "openmeteo": openmeteo_backend,
+    "metar": metar_backend,
+}
+
+
+def register_backend(name, func):
+    """Add a backend: func(code, settings, lat=None, lon=None) -> str | None."""
+    BACKENDS[name.lower()] = func
+
+
+def backends_for(code, settings, gps=False):
+    """Backends to try, in order: ICAO codes prefer METAR, then weather.ini's provider."""
+    order = []
+    if not gps and code and re.fullmatch(r"[A-Za-z]{4}", code):
+        order.append("metar")
+    order.append(settings["provider"])
+    order.append("openmeteo")
+    seen = []
+    for name in order:
+        if name in BACKENDS and name not in seen:
+            seen.append(name)
+    return seen
+
+
+def lookup(code=None, lat=None, lon=None, settings=None):
+    """Return weather text for a code or coordinates, or None on any failure."""
+    if settings is None:
+        try:
+            settings = load_settings()
+        except Exception as e:
+            print(f"[NodeStatus] Weather settings unreadable: {type(e).__name__}: {e}")
+            return None
+    code = str(code or "").strip()
+    gps = lat is not None and lon is not None
+    for name in backends_for(code, settings, gps=gps):
+        try:
+            report = BACKENDS[name](code, settings, lat=lat, lon=lon)
+        except Exception as e:
+            # Any backend bug or malformed response must not abort the status run;
+            # the caller falls back to the weather scripts when every backend fails.
+            print(f"[NodeStatus] Weather backend {name} failed: {type(e).__name__}: {e}")
+            continue
+        if report:
+            return report
+    return None
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    if len(args) == 2 and args[0] == "--gps":
+        lat, _, lon = args[1].partition(",")
+        report = lookup(lat=float(lat), lon=float(lon))
+    elif len(args) == 1:
+        report = lookup(args[0])
+    else:
+        print(__doc__.strip().split("Usage:", 1)[1], file=sys.stderr)
+        return 2
+    if not report:
+        return 1
+    print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Offline reverse geocoder for GPS weather labels.
+
+Builds a compact binary index from a GeoNames-style gazetteer (cities*.txt
+plus admin1CodesASCII.txt from https://download.geonames.org/export/dump/)
+and answers "nearest City, State" for a lat/lon without network access.
+
+The index is a uniform lat/lon grid: places are sorted by grid cell and
+stored as parallel float32 arrays, so loading is a few array.frombytes()
+calls and a lookup only visits the cells around the fix.
+
+Usage:
+  offline_geocoder.py build --cities cities1000.txt [--admin1 admin1CodesASCII.txt]
+                            [--min-population N] [--out PATH]
+  offline_geocoder.py lookup LAT LON [--index PATH] [--max-km KM]
+"""
+
+import argparse
+import array
+import bisect
+import math
+import os
+import struct
+import sys
+
+DEFAULT_INDEX = "/var/lib/supermon-ng/geonames.idx"
+DEFAULT_MAX_KM = 100.0
+CELL_DEG = 1.0
+
+MAGIC = b"SMGZ"
+VERSION = 1
+# magic, version, cell size (deg), places, cells, label bytes
+HEADER = struct.Struct("<4sHfIII")
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell_coords(lat, lon, cell_deg):
+    row = min(int((lat + 90.0) // cell_deg), int(180 / cell_deg) - 1)
+    col = int(((lon + 180.0) % 360.0) // cell_deg)
+    return row, col
+
+
+def _cell_key(row, col, cell_deg):
+    return row * int(round(360 / cell_deg)) + col
+
+
+def _read_admin1(path):
+    names = {}
+    if not path:
+        return names
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) >= 2:
+                names[parts[0]] = parts[1]
+    return names
+
+
+def build_index(cities_path, out_path, admin1_path=None, min_population=0, cell_deg=CELL_DEG):
+    """Parse a GeoNames cities file once and write the binary index; returns place count."""
+    admin1 = _read_admin1(admin1_path)
+    places = []
+    with open(cities_path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 15:
+                continue
+            try:
+                lat, lon = float(parts[4]), float(parts[5])
+                population = int(parts[14] or 0)
+            except ValueError:
+                continue
+            if population < min_population:
+                continue
+            name = parts[1]
+            region = admin1.get(f"{parts[8]}.{parts[10]}") or parts[8]
+            label = f"{name}, {region}" if region else name
+            row, col = _cell_coords(lat, lon, cell_deg)
+            places.append((_cell_key(row, col, cell_deg), lat, lon, label))
+    places.sort(key=lambda p: p[0])
+
+    lats, lons = array.array("f"), array.array("f")
+    label_offsets = array.array("I")
+    cell_keys, cell_starts = array.array("I"), array.array("I")
+    labels = bytearray()
+    for i, (key, lat, lon, label) in enumerate(places):
+        if not cell_keys or cell_keys[-1] != key:
+            cell_keys.append(key)
+            cell_starts.append(i)
+        lats.append(lat)
+        lons.append(lon)
+        label_offsets.append(len(labels))
+        labels += label.encode("utf-8")
+    cell_starts.append(len(places))
+    label_offsets.append(len(labels))
+
+    for arr in (lats, lons, label_offsets, cell_keys, cell_starts):
+        if sys.byteorder != "little":
+            arr.byteswap()
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, cell_deg, len(places), len(cell_keys), len(labels)))
+        for arr in (cell_keys, cell_starts, lats, lons, label_offsets):
+            arr.tofile(f)
+        f.write(labels)
+    os.replace(tmp, out_path)
+    return len(places)
+
+
+class OfflineGeocoder:
+    """Nearest-place lookup over an index written by build_index()."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, cell_deg, n_places, n_cells, n_label_bytes = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a geocoder index")
+        self.cell_deg = cell_deg
+        self.rows = int(round(180 / cell_deg))
+        self.cols = int(round(360 / cell_deg))
+        offset = HEADER.size
+
+        def take(typecode, count):
+            nonlocal offset
+            arr = array.array(typecode)
+            size = arr.itemsize * count
+            arr.frombytes(data[offset:offset + size])
+            if sys.byteorder != "little":
+                arr.byteswap()
+            offset += size
+            return arr
+
+        self.cell_keys = take("I", n_cells)
+        self.cell_starts = take("I", n_cells + 1)
+        self.lats = take("f", n_places)
+        self.lons = take("f", n_places)
+        self.label_offsets = take("I", n_places + 1)
+        self.labels = data[offset:offset + n_label_bytes]
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _cell_range(self, key):
+        i = bisect.bisect_left(self.cell_keys, key)
+        if i < len(self.cell_keys) and self.cell_keys[i] == key:
+            return self.cell_starts[i], self.cell_starts[i + 1]
+        return 0, 0
+
+    def label(self, i):
+        return self.labels[self.label_offsets[i]:self.label_offsets[i + 1]].decode("utf-8")
+
+    def _ring_min_km(self, lat, ring):
+        """Lower bound on the distance from lat to any cell `ring` steps away."""
+        gap = (ring - 1) * self.cell_deg
+        if gap <= 0:
+            return 0.0
+        north_south = math.radians(gap) * EARTH_RADIUS_KM
+        # Closest approach to a meridian gap degrees away (great circle)
+        east_west = EARTH_RADIUS_KM * math.asin(
+            min(1.0, math.cos(math.radians(lat)) * math.sin(math.radians(min(gap, 90.0))))
+        )
+        return min(north_south, east_west)
+
+    def nearest(self, lat, lon, max_km=DEFAULT_MAX_KM):
+        """Return (label, distance_km) of the closest place within max_km, or None."""
+        row0, col0 = _cell_coords(lat, lon, self.cell_deg)
+        best, best_km = None, float("inf")
+        for ring in range(self.cols // 2 + 1):
+            if self._ring_min_km(lat, ring) > min(best_km, max_km):
+                break
+            for row in range(row0 - ring, row0 + ring + 1):
+                if row < 0 or row >= self.rows:
+                    continue
+                edge = row in (row0 - ring, row0 + ring)
+                cols = range(col0 - ring, col0 + ring + 1) if edge else (col0 - ring, col0 + ring)
+                for col in cols:
+                    start, end = self._cell_range(_cell_key(row, col % self.cols, self.cell_deg))
+                    for i in range(start, end):
+                        d = _haversine_km(lat, lon, self.lats[i], self.lons[i])
+                        if d < best_km:
+                            best, best_km = i, d
+        if best is None or best_km > max_km:
+            return None
+        return self.label(best), best_km
+
+
+_loaded = {}
+
+
+def load(path=DEFAULT_INDEX):
+    """Cached OfflineGeocoder for path, or None when the index is missing or invalid."""
+    if path not in _loaded:
+        try:
+            _loaded[path] = OfflineGeocoder(path)
+        except (OSError, ValueError, struct.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"[NodeStatus] Offline geocoder index unusable ({path}): {e}")
+            _loaded[path] = None
+    return _loaded[path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline reverse geocoder (GeoNames).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build")
+    p_build.add_argument("--cities", required=True)
+    p_build.add_argument("--admin1")
+    p_build.add_argument("--min-population", type=int, default=0)
+    p_build.add_argument("--out", default=DEFAULT_INDEX)
+    p_lookup = sub.add_parser("lookup")
+    p_lookup.add_argument("lat", type=float)
+    p_lookup.add_argument("lon", type=float)
+    p_lookup.add_argument("--index", default=DEFAULT_INDEX)
+    p_lookup.add_argument("--max-km", type=float, default=DEFAULT_MAX_KM)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_index(args.cities, args.out, args.admin1, args.min_population)
+        print(f"Wrote {count} places to {args.out} ({os.path.getsize(args.out)} bytes)")
+        return 0
+
+    geocoder = load(args.index)
+    if geocoder is None:
+        print(f"Index not found: {args.index}", file=sys.stderr)
+        return 1
+    found = geocoder.nearest(args.lat, args.lon, max_km=args.max_km)
+    if not found:
+        return 1
+    print(f"{found[0]}\t{found[1]:.1f} km")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())